@@ -1,117 +1,184 @@
-import pandas as pd
-import networkx as nx
 import matplotlib.pyplot as plt
-import community as community_louvain
-from collections import defaultdict
-from tqdm import tqdm
-import numpy as np
-
-# Charger les données
-df = pd.read_csv("euvsdisinfo_v1_2.csv", delimiter="\t")
+from profils import COLONNES_PROFIL, construire_profils, entites_frequentes
+from chargement import FICHIER_DONNEES, charger_donnees, empreinte_fichier
+from flux import TAILLE_MORCEAU, entites_frequentes_profils, profils_en_flux
+from similarite import POIDS_TEXTE_GEO, aretes_knn, aretes_similarite
+from graphe import GrapheCompact
+from lsh import aretes_lsh, rappel_lsh
+from parallele import aretes_paralleles, aretes_paralleles_magasin
+from magasin_profils import ecrire_magasin, magasin_a_jour
+from incremental import mettre_a_jour_graphe
+from cache_scores import aretes_en_cache, empreinte_donnees
+from rendu import dessiner_reseau, dessiner_reseau_raster
+from disposition import disposition, charger_positions, sauver_positions
+from communautes import detecter_communautes, balayage_resolutions, choisir_resolution
+from analyses import ECHANTILLON_INTERMEDIARITE, exporter_analyses
+from instrumentation import RapportExecution
+
+# Lecture en flux pour les fichiers plus grands que la mémoire : le fichier est lu par
+# morceaux de TAILLE_MORCEAU lignes et seuls les profils agrégés sont conservés
+# (incompatible avec INCREMENTAL, qui a besoin des lignes)
+FLUX = False
 
 # Paramètres ajustables
 TOP_OUTLETS = 3000
 SIM_THRESHOLD = 0.25
 MAX_LABELS_PER_COMM = 5
 
-# Limiter aux outlets les plus fréquents
-top_outlets = df['outlet'].value_counts().head(TOP_OUTLETS).index.tolist()
-
-# Graphe initial
-G = nx.Graph()
-G.add_nodes_from(top_outlets)
-
-# Fonction de similarité optimisée
-def advanced_similarity(outlet1, outlet2, df):
-    data1 = df[df['outlet'] == outlet1]
-    data2 = df[df['outlet'] == outlet2]
-
-    keywords1 = set(','.join(data1['keywords'].fillna('')).split(','))
-    keywords2 = set(','.join(data2['keywords'].fillna('')).split(','))
-    text_sim = len(keywords1 & keywords2) / len(keywords1 | keywords2) if (keywords1 and keywords2) else 0
+# Graphe des KNN plus proches voisins de chaque outlet au lieu de toutes les paires
+# au-dessus de SIM_THRESHOLD (qui reste un plancher) ; KNN_MUTUEL : voisins mutuels seulement
+KNN = None  # ex. 10
+KNN_MUTUEL = False
+
+# Génération approchée des paires candidates (MinHash LSH sur les mots-clés)
+USE_LSH = False
+LSH_BANDES = 20
+LSH_LIGNES = 5
+LSH_ECHANTILLON_RAPPEL = 1000
+
+# Nombre de processus pour le calcul des similarités (1 = séquentiel)
+NB_PROCESSUS = 1
+
+# Magasin de profils projeté en mémoire : les processus s'y attachent au lieu de recevoir
+# les profils encodés ; il est réécrit quand les données ou TOP_OUTLETS changent
+MAGASIN_PROFILS = None  # ex. "magasin_outlets"
+
+# Mise à jour incrémentale : ne recalculer que les outlets dont les lignes ont changé
+# depuis le lancement précédent (profils et arêtes enregistrés dans FICHIER_ETAT)
+INCREMENTAL = False
+FICHIER_ETAT = "graphe_outlets.pkl"
+
+# Cache disque des scores par attribut : changer SIM_THRESHOLD ou les poids
+# ne demande plus qu'un nouveau mélange des scores enregistrés. Désactivé par défaut :
+# un premier calcul coûte plus cher que le calcul direct, et le cache remplace alors
+# le calcul parallèle (NB_PROCESSUS, MAGASIN_PROFILS)
+CACHE_SCORES = False
+
+# Layout : 'barnes_hut' (force-dirigé approché), 'spectrale' ou 'spring' (networkx)
+# Les positions sont gardées dans FICHIER_POSITIONS pour repartir du rendu précédent
+LAYOUT = 'barnes_hut'
+FICHIER_POSITIONS = "positions_outlets.json"
+
+# Rendu : 'vectoriel' (un artiste matplotlib par arête) ou 'raster' (accumulation
+# numpy dans une image, pour les composantes denses à dizaines de milliers d'arêtes)
+RENDU = 'vectoriel'
+
+# Communautés : 'csr' (Louvain vectorisé sur la matrice creuse), 'leiden' (si igraph
+# et leidenalg sont installés) ou 'python-louvain' (community.best_partition)
+METHODE_COMMUNAUTES = 'csr'
+RESOLUTION = 0.9
+# Balayage optionnel : modularité et stabilité (Rand ajusté entre graines) par résolution,
+# la partition de la meilleure résolution remplaçant alors celle de RESOLUTION
+RESOLUTIONS_BALAYAGE = None  # ex. [0.6, 0.8, 0.9, 1.0, 1.2]
+GRAINES_BALAYAGE = (0, 1, 2, 3)
+
+# Tables d'analyse (metriques_noeuds, metriques_communautes) écrites dans DOSSIER_ANALYSES ;
+# l'intermédiarité est estimée sur ECHANTILLON_INTERMEDIARITE sources (analyses.py)
+DOSSIER_ANALYSES = "analyses_outlets"
+
+# Rapport d'exécution JSON : durée, temps CPU, pic mémoire et compteurs (paires évaluées,
+# élaguées, arêtes, accès aux caches) par étape. Les étapes nommées dans PROFILER_ETAPES
+# passent sous cProfile, celles de TRACER_ETAPES sous tracemalloc.
+FICHIER_RAPPORT = "rapport_execution.json"
+PROFILER_ETAPES = ()  # ex. ('similarite', 'communautes')
+TRACER_ETAPES = ()
+
+execution = RapportExecution('Toutes_données_N', profiler=PROFILER_ETAPES, tracer=TRACER_ETAPES,
+                             parametres={'top': TOP_OUTLETS, 'seuil': SIM_THRESHOLD, 'flux': FLUX, 'lsh': USE_LSH,
+                                         'knn': KNN, 'knn_mutuel': KNN_MUTUEL, 'processus': NB_PROCESSUS, 'incremental': INCREMENTAL,
+                                         'cache_scores': CACHE_SCORES, 'layout': LAYOUT, 'rendu': RENDU,
+                                         'communautes': METHODE_COMMUNAUTES, 'resolution': RESOLUTION})
+execution.demarrer()
 
-    geo_sim = len(set(data1['country']) & set(data2['country'])) / len(set(data1['country']) | set(data2['country'])) if (not data1['country'].empty and not data2['country'].empty) else 0
-
-    return 0.6 * text_sim + 0.4 * geo_sim
-
-# Construction du graphe
+# Charger les données
+with execution.etape('chargement'):
+    if FLUX:
+        profils_flux = profils_en_flux(FICHIER_DONNEES, 'outlet', TAILLE_MORCEAU)
+    else:
+        df = charger_donnees(colonnes=['outlet'] + COLONNES_PROFIL)
+
+# Limiter aux outlets les plus fréquents, puis profils (mots-clés, pays...) calculés une seule fois
+# (en mode incrémental, seuls les profils des outlets modifiés sont reconstruits plus bas)
+with execution.etape('profils'):
+    if FLUX:
+        top_outlets = entites_frequentes_profils(profils_flux, TOP_OUTLETS)
+        profils = {outlet: profils_flux[outlet] for outlet in top_outlets}
+    else:
+        top_outlets = entites_frequentes(df['outlet'], TOP_OUTLETS)
+        if not INCREMENTAL:
+            profils = construire_profils(df, 'outlet', top_outlets)
+
+# Graphe initial (tableaux numpy pendant la construction, networkx seulement pour le rendu)
+G = GrapheCompact(top_outlets)
+
+# Construction du graphe (Jaccard 0.6 mots-clés / 0.4 pays, par produits de matrices creuses)
 print("Construction du graphe...")
-for i, o1 in enumerate(tqdm(top_outlets)):
-    for j in range(i + 1, len(top_outlets)):
-        o2 = top_outlets[j]
-        sim = advanced_similarity(o1, o2, df)
-        if sim >= SIM_THRESHOLD:
-            G.add_edge(o1, o2, weight=sim)
-
-# Extraction du composant principal
-largest_component = max(nx.connected_components(G), key=len)
-G = G.subgraph(largest_component)
+with execution.etape('similarite'):
+    if INCREMENTAL and not FLUX:
+        profils, aretes, recalcules = mettre_a_jour_graphe(df, 'outlet', top_outlets, POIDS_TEXTE_GEO,
+                                                           SIM_THRESHOLD, fichier_etat=FICHIER_ETAT)
+        print(f"{len(recalcules)} outlets recalculés sur {len(top_outlets)}")
+    elif KNN:
+        aretes = aretes_knn(profils, top_outlets, POIDS_TEXTE_GEO, KNN, KNN_MUTUEL, SIM_THRESHOLD, progression=True)
+    elif USE_LSH:
+        rappel = rappel_lsh(profils, top_outlets, POIDS_TEXTE_GEO, SIM_THRESHOLD,
+                            LSH_BANDES, LSH_LIGNES, LSH_ECHANTILLON_RAPPEL)
+        print(f"Rappel LSH sur {rappel['entites']} outlets : {rappel['rappel']:.1%} "
+              f"({rappel['paires_candidates']} paires candidates sur {rappel['paires_totales']})")
+        aretes = aretes_lsh(profils, top_outlets, POIDS_TEXTE_GEO, SIM_THRESHOLD, LSH_BANDES, LSH_LIGNES)
+    elif CACHE_SCORES:
+        if FLUX:
+            empreinte = empreinte_fichier(FICHIER_DONNEES)
+        else:
+            empreinte = empreinte_donnees(df, ['outlet'] + COLONNES_PROFIL)
+        aretes = aretes_en_cache(profils, top_outlets, POIDS_TEXTE_GEO, SIM_THRESHOLD, empreinte)
+    elif NB_PROCESSUS > 1 and MAGASIN_PROFILS:
+        empreinte = f"{empreinte_fichier(FICHIER_DONNEES)}:outlet:{TOP_OUTLETS}"
+        if not magasin_a_jour(MAGASIN_PROFILS, empreinte):
+            ecrire_magasin(profils, top_outlets, MAGASIN_PROFILS, empreinte)
+        aretes = aretes_paralleles_magasin(MAGASIN_PROFILS, POIDS_TEXTE_GEO, SIM_THRESHOLD,
+                                           nb_processus=NB_PROCESSUS, progression=True)
+    elif NB_PROCESSUS > 1:
+        aretes = aretes_paralleles(profils, top_outlets, POIDS_TEXTE_GEO, SIM_THRESHOLD,
+                                   nb_processus=NB_PROCESSUS, progression=True)
+    else:
+        aretes = aretes_similarite(profils, top_outlets, POIDS_TEXTE_GEO, SIM_THRESHOLD, progression=True)
+    G.ajouter_aretes(*aretes)
+
+# Extraction du composant principal, puis conversion pour les communautés et le rendu
+with execution.etape('composantes'):
+    G = G.composante_principale().vers_networkx()
 
 # Détection de communautés
-partition = community_louvain.best_partition(G, resolution=0.9)
-
-# Création de la figure avec espace pour colorbar
-plt.figure(figsize=(16, 12))
-plt.rcParams.update({'font.size': 8})
-grid = plt.GridSpec(1, 2, width_ratios=[0.9, 0.05])
-ax = plt.subplot(grid[0])
-
-# Layout
-pos = nx.spring_layout(G, k=0.5, iterations=100, seed=42)
-
-# Couleurs et tailles
-cmap = plt.cm.tab20
-node_colors = [partition[n] for n in G.nodes()]
-degrees = dict(G.degree())
-node_sizes = [300 + 1000 * degrees[n]/max(degrees.values()) for n in G.nodes()]
-
-# Dessin du graphe
-nx.draw_networkx_nodes(G, pos,
-                      node_color=node_colors,
-                      cmap=cmap,
-                      node_size=node_sizes,
-                      alpha=0.9,
-                      edgecolors='black',
-                      linewidths=0.5,
-                      ax=ax)
-
-edge_weights = [G[u][v]['weight']*2 for u,v in G.edges()]
-nx.draw_networkx_edges(G, pos,
-                      width=edge_weights,
-                      alpha=0.1 + 0.3*np.array(edge_weights)/max(edge_weights),
-                      edge_color='lightgray',
-                      ax=ax)
-
-# Labels stratégiques
-labels_to_show = {}
-comm_counts = defaultdict(int)
-central_nodes = sorted(G.nodes(), key=lambda x: degrees[x], reverse=True)
-
-for node in central_nodes:
-    comm = partition[node]
-    if comm_counts[comm] < MAX_LABELS_PER_COMM:
-        labels_to_show[node] = node.split('.')[0][:15]  # Raccourcir davantage
-        comm_counts[comm] += 1
-
-nx.draw_networkx_labels(G, pos,
-                       labels=labels_to_show,
-                       font_size=9,
-                       font_weight='bold',
-                       bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'),
-                       ax=ax)
-
-# Colorbar
-cax = plt.subplot(grid[1])
-sm = plt.cm.ScalarMappable(cmap=cmap,
-                          norm=plt.Normalize(vmin=min(node_colors),
-                                           vmax=max(node_colors)))
-sm.set_array([])
-plt.colorbar(sm, cax=cax, label='Communauté')
-
-# Titre et ajustement
-plt.suptitle(f"Réseau des {len(G.nodes())} principaux outlets\n"
-            f"Communautés détectées (seuil: {SIM_THRESHOLD})",
-            y=0.95, fontsize=12)
-plt.tight_layout()
-plt.savefig('network_final.png', dpi=300, bbox_inches='tight')
-plt.show()
\ No newline at end of file
+with execution.etape('communautes'):
+    if RESOLUTIONS_BALAYAGE:
+        rapport = balayage_resolutions(G, RESOLUTIONS_BALAYAGE, GRAINES_BALAYAGE, METHODE_COMMUNAUTES)
+        for r in rapport:
+            print(f"résolution {r['resolution']:.2f} : modularité {r['modularite_moyenne']:.4f} "
+                  f"(max {r['modularite_max']:.4f}, standard {r['modularite_standard']:.4f}), "
+                  f"{r['communautes']} communautés, stabilité {r['stabilite']:.3f}")
+        # Résolution la plus stable, départagée par la modularité standard (résolution 1)
+        partition = choisir_resolution(rapport)['partition']
+    else:
+        partition = detecter_communautes(G, RESOLUTION, graine=42, methode=METHODE_COMMUNAUTES)
+
+# Métriques par nœud (degré, force, PageRank, intermédiarité) et par communauté
+with execution.etape('analyses'):
+    metriques, _ = exporter_analyses(G, partition, DOSSIER_ANALYSES, ECHANTILLON_INTERMEDIARITE, graine=42)
+
+# Layout (démarrage à chaud depuis les positions du rendu précédent)
+with execution.etape('disposition'):
+    pos = disposition(G, LAYOUT, iterations=100, graine=42, pos_initiales=charger_positions(FICHIER_POSITIONS))
+    sauver_positions(pos, FICHIER_POSITIONS)
+
+# Dessin du réseau (communautés, labels stratégiques) et export PNG
+with execution.etape('rendu'):
+    dessin = dessiner_reseau_raster if RENDU == 'raster' else dessiner_reseau
+    dessin(G, partition, SIM_THRESHOLD, MAX_LABELS_PER_COMM, fichier='network_final.png', pos=pos, afficher=False,
+           degres=dict(zip(G.nodes(), metriques['degre'])), entites='outlets')
+
+# Rapport écrit avant l'affichage, pour que le temps passé devant la fenêtre n'y figure pas
+execution.terminer()
+execution.ecrire(FICHIER_RAPPORT)
+print(f"Rapport d'exécution : {FICHIER_RAPPORT}")
+plt.show()
@@ -0,0 +1,165 @@
+import os
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from communautes import adjacence
+
+# PageRank : facteur d'amortissement, tolérance et nombre maximal d'itérations (ceux de networkx)
+AMORTISSEMENT = 0.85
+TOLERANCE_PAGERANK = 1e-6
+ITERATIONS_PAGERANK = 100
+
+# Intermédiarité approchée : nombre de sources tirées et sources traitées ensemble
+ECHANTILLON_INTERMEDIARITE = 256
+TAILLE_LOT = 64
+
+# Entités de plus forte centralité gardées par communauté
+NB_PRINCIPAUX = 10
+
+
+# Degré (nombre de voisins) et force (somme des poids) de chaque nœud ; les graphes de
+# similarité n'ont pas de boucle
+def degres_forces(A):
+    return np.diff(A.indptr), np.asarray(A.sum(axis=1)).ravel()
+
+
+# PageRank pondéré par itérations de puissance sur la matrice creuse (même définition
+# que nx.pagerank : les nœuds sans voisin redistribuent leur score uniformément)
+def pagerank(A, amortissement=AMORTISSEMENT, tolerance=TOLERANCE_PAGERANK, iterations=ITERATIONS_PAGERANK):
+    n = A.shape[0]
+    if n == 0:
+        return np.empty(0)
+    forces = np.asarray(A.sum(axis=1)).ravel()
+    isoles = forces == 0
+    inverses = np.divide(1.0, forces, out=np.zeros(n), where=~isoles)
+    AT = A.T.tocsr()
+    x = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        precedent = x
+        x = amortissement * (AT @ (x * inverses) + x[isoles].sum() / n) + (1 - amortissement) / n
+        if np.abs(x - precedent).sum() < n * tolerance:
+            break
+    return x
+
+
+# Intermédiarité (en nombre de sauts, les poids de similarité n'étant pas des distances)
+# estimée à partir de `echantillon` sources tirées au hasard, normalisée comme
+# nx.betweenness_centrality(G, k=echantillon). Algorithme de Brandes vectorisé : un lot de
+# sources avance niveau par niveau (produit matrice creuse x tableau dense) pour compter
+# les plus courts chemins, puis les dépendances remontent les niveaux de la même façon.
+def intermediarite(A, echantillon=ECHANTILLON_INTERMEDIARITE, graine=42, taille_lot=TAILLE_LOT):
+    n = A.shape[0]
+    if n <= 2:
+        return np.zeros(n)
+    B = (A != 0).astype(np.float64).tocsr()
+    B.setdiag(0)
+    B.eliminate_zeros()
+    k = n if echantillon is None else min(echantillon, n)
+    sources = np.random.default_rng(graine).choice(n, size=k, replace=False) if k < n else np.arange(n)
+
+    total = np.zeros(n)
+    for debut in range(0, k, taille_lot):
+        lot = sources[debut:debut + taille_lot]
+        lignes = np.arange(len(lot))
+        chemins = np.zeros((len(lot), n))
+        chemins[lignes, lot] = 1.0
+        niveaux = np.full((len(lot), n), -1, dtype=np.int32)
+        niveaux[lignes, lot] = 0
+
+        # Parcours en largeur simultané : nombre de plus courts chemins par niveau
+        frontiere, profondeur = chemins.copy(), 0
+        while frontiere.any():
+            suivants = (B @ frontiere.T).T
+            nouveaux = (niveaux < 0) & (suivants > 0)
+            profondeur += 1
+            niveaux[nouveaux] = profondeur
+            chemins[nouveaux] = suivants[nouveaux]
+            frontiere = np.where(nouveaux, suivants, 0.0)
+
+        # Accumulation des dépendances, du niveau le plus profond vers les sources
+        dependances = np.zeros((len(lot), n))
+        for niveau in range(profondeur, 0, -1):
+            coefficients = np.where(niveaux == niveau, (1 + dependances) / np.maximum(chemins, 1.0), 0.0)
+            remontees = (B @ coefficients.T).T
+            precedents = niveaux == niveau - 1
+            dependances[precedents] += (chemins * remontees)[precedents]
+        dependances[lignes, lot] = 0.0
+        total += dependances.sum(axis=0)
+
+    return total * (n / k) / ((n - 1) * (n - 2))
+
+
+# Table des métriques par nœud : communauté, degré, force, PageRank, intermédiarité
+def metriques_noeuds(A, noeuds, etiquettes, echantillon=ECHANTILLON_INTERMEDIARITE, graine=42):
+    degres, forces = degres_forces(A)
+    return pd.DataFrame({
+        'entite': [str(n) for n in noeuds],
+        'communaute': etiquettes,
+        'degre': degres,
+        'force': forces,
+        'pagerank': pagerank(A),
+        'intermediarite': intermediarite(A, echantillon, graine),
+    })
+
+
+# Agrégats par communauté : taille, arêtes et poids internes, densité interne, arêtes vers
+# les autres communautés, centralités moyennes et entités principales (PageRank)
+def agreger_communautes(A, metriques, nb_principaux=NB_PRINCIPAUX):
+    etiquettes = metriques['communaute'].to_numpy()
+    nb = int(etiquettes.max()) + 1 if len(etiquettes) else 0
+    haut = sp.triu(A, k=1).tocoo()
+    internes = etiquettes[haut.row] == etiquettes[haut.col]
+    taille = np.bincount(etiquettes, minlength=nb)
+    aretes_internes = np.bincount(etiquettes[haut.row[internes]], minlength=nb)
+    poids_interne = np.bincount(etiquettes[haut.row[internes]], weights=haut.data[internes], minlength=nb)
+    externes = np.bincount(np.concatenate([etiquettes[haut.row[~internes]], etiquettes[haut.col[~internes]]]),
+                           minlength=nb)
+    paires = taille * (taille - 1) / 2
+
+    par_communaute = metriques.groupby('communaute', sort=True)
+    ordre = metriques.sort_values(['communaute', 'pagerank'], ascending=[True, False], kind='stable')
+    principaux = ordre.groupby('communaute', sort=True)['entite'].apply(lambda e: list(e[:nb_principaux]))
+    return pd.DataFrame({
+        'communaute': np.arange(nb),
+        'taille': taille,
+        'aretes_internes': aretes_internes,
+        'poids_interne': poids_interne,
+        'densite_interne': np.divide(aretes_internes, paires, out=np.zeros(nb), where=paires > 0),
+        'aretes_externes': externes,
+        'degre_moyen': par_communaute['degre'].mean().reindex(range(nb)).to_numpy(),
+        'pagerank_total': par_communaute['pagerank'].sum().reindex(range(nb)).to_numpy(),
+        'intermediarite_max': par_communaute['intermediarite'].max().reindex(range(nb)).to_numpy(),
+        'principaux': principaux.reindex(range(nb)).to_list(),
+    })
+
+
+# Métriques par nœud et agrégats par communauté d'un graphe networkx et de sa partition
+# (numéros de communauté de la partition conservés)
+def analyser_graphe(G, partition, echantillon=ECHANTILLON_INTERMEDIARITE, graine=42):
+    A, noeuds = adjacence(G)
+    valeurs, etiquettes = np.unique(np.array([partition[n] for n in noeuds]), return_inverse=True)
+    metriques = metriques_noeuds(A, noeuds, etiquettes, echantillon, graine)
+    communautes = agreger_communautes(A, metriques)
+    metriques['communaute'] = valeurs[etiquettes]
+    communautes['communaute'] = valeurs
+    return metriques, communautes
+
+
+# Écrire une table en Parquet (CSV si pyarrow manque), comme les exports du pipeline
+def ecrire_table(table, dossier, nom):
+    os.makedirs(dossier, exist_ok=True)
+    try:
+        chemin = os.path.join(dossier, nom + '.parquet')
+        table.to_parquet(chemin, index=False)
+    except ImportError:
+        chemin = os.path.join(dossier, nom + '.csv')
+        table.to_csv(chemin, index=False)
+    return chemin
+
+
+# Calculer et écrire les tables d'analyse (metriques_noeuds, metriques_communautes)
+def exporter_analyses(G, partition, dossier, echantillon=ECHANTILLON_INTERMEDIARITE, graine=42):
+    metriques, communautes = analyser_graphe(G, partition, echantillon, graine)
+    ecrire_table(metriques, dossier, 'metriques_noeuds')
+    ecrire_table(communautes, dossier, 'metriques_communautes')
+    return metriques, communautes
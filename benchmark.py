@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from chargement import charger_donnees
+from communautes import detecter_communautes
+from disposition import disposition
+from graphe import GrapheCompact
+from instrumentation import version_code
+from pipeline import ENTITES, PLURIELS, charger_entites
+from profils import construire_profils, entites_frequentes
+from similarite import POIDS_TEXTE_GEO, aretes_similarite
+
+# Étapes chronométrées, dans l'ordre du pipeline
+ETAPES = ('chargement', 'profils', 'similarite', 'composantes', 'communautes', 'disposition', 'rendu')
+
+DOSSIER_BENCHMARK = "benchmarks"
+FICHIER_RESULTATS = "resultats.jsonl"
+
+PAYS = ['Russia', 'Ukraine', 'Germany', 'France', 'Poland', 'United States', 'United Kingdom', 'Georgia',
+        'Belarus', 'Moldova', 'Lithuania', 'Latvia', 'Estonia', 'Armenia', 'Azerbaijan', 'Syria', 'Italy',
+        'Spain', 'Czech Republic', 'Slovakia', 'Hungary', 'Romania', 'Bulgaria', 'Serbia', 'Sweden',
+        'Finland', 'Norway', 'Netherlands', 'Belgium', 'Austria']
+LANGUES = ['Russian', 'English', 'German', 'French', 'Ukrainian', 'Polish', 'Spanish', 'Italian', 'Georgian',
+           'Arabic', 'Czech', 'Hungarian']
+
+
+# Tirage de rangs selon une loi de Zipf tronquée à n valeurs (P(r) ∝ 1 / r^exposant)
+def _zipf(rng, n, taille, exposant=1.1):
+    probabilites = 1.0 / np.arange(1, n + 1) ** exposant
+    return rng.choice(n, size=taille, p=probabilites / probabilites.sum())
+
+
+# Jeu de données synthétique au format euvsdisinfo (TSV) : outlets et mots-clés
+# suivent une loi de Zipf ; chaque outlet a un thème (décalage dans le vocabulaire),
+# un pays et une langue de prédilection pour que le graphe ait des communautés.
+# Chaque outlet apparaît au moins une fois, il y a donc exactement nb_outlets outlets.
+def generer_donnees(chemin, nb_outlets, lignes_par_outlet=5, nb_mots_cles=None, graine=42):
+    rng = np.random.default_rng(graine)
+    nb_mots_cles = nb_mots_cles or max(200, nb_outlets // 2)
+    nb_lignes = nb_outlets * lignes_par_outlet
+
+    outlets = np.concatenate([np.arange(nb_outlets), _zipf(rng, nb_outlets, nb_lignes - nb_outlets)])
+    rng.shuffle(outlets)
+    theme = rng.integers(0, nb_mots_cles, nb_outlets)
+    pays_outlet = _zipf(rng, len(PAYS), nb_outlets)
+    langue_outlet = _zipf(rng, len(LANGUES), nb_outlets)
+
+    # Mots-clés : 1 à 3 par ligne, proches du thème de l'outlet dans 70 % des cas
+    nombres = rng.integers(1, 4, nb_lignes)
+    ligne = np.repeat(np.arange(nb_lignes), nombres)
+    rangs = _zipf(rng, nb_mots_cles, len(ligne))
+    thematiques = rng.random(len(ligne)) < 0.7
+    mots = np.where(thematiques, (theme[outlets[ligne]] + rangs % 50) % nb_mots_cles, rangs)
+    noms_mots = np.array([f"kw{i}" for i in range(nb_mots_cles)], dtype=object)
+    bornes = np.cumsum(nombres)[:-1]
+    keywords = [",".join(m) for m in np.split(noms_mots[mots], bornes)]
+
+    # Pays (parfois combiné "A, B") et langue : ceux de l'outlet dans 80 % des cas
+    pays = np.where(rng.random(nb_lignes) < 0.8, pays_outlet[outlets], rng.integers(0, len(PAYS), nb_lignes))
+    pays = np.array(PAYS, dtype=object)[pays]
+    combines = rng.random(nb_lignes) < 0.05
+    pays[combines] = pays[combines] + ", " + np.array(PAYS, dtype=object)[rng.integers(0, len(PAYS), combines.sum())]
+    pays[rng.random(nb_lignes) < 0.1] = None
+    langues = np.where(rng.random(nb_lignes) < 0.8, langue_outlet[outlets],
+                       rng.integers(0, len(LANGUES), nb_lignes))
+    langues = np.array(LANGUES, dtype=object)[langues]
+    langues[rng.random(nb_lignes) < 0.1] = None
+
+    # Dates jj/mm/aaaa entre 2015 et 2023, avec quelques valeurs invalides
+    jours = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 9 * 365, nb_lignes), unit='D')
+    dates = np.array(jours.strftime('%d/%m/%Y'), dtype=object)
+    dates[rng.random(nb_lignes) < 0.02] = 'bad'
+
+    df = pd.DataFrame({
+        'outlet': [f"site{i}.com" for i in outlets],
+        'keywords': keywords,
+        'country': pays,
+        'target_language': langues,
+        'publication_date': dates,
+    })
+    df.to_csv(chemin, sep="\t", index=False)
+    return df
+
+
+# Chronométrer chaque étape du pipeline d'un type d'entité sur un fichier
+def mesurer_pipeline(chemin, entite, top, seuil=0.25, poids=POIDS_TEXTE_GEO, rendu=True, graine=42):
+    temps = {}
+
+    def chronometre(etape, fonction, *args, **kwargs):
+        debut = time.perf_counter()
+        resultat = fonction(*args, **kwargs)
+        temps[etape] = time.perf_counter() - debut
+        return resultat
+
+    colonne = ENTITES[entite]
+    df = chronometre('chargement', charger_entites, entite, chemin)
+
+    def profiler():
+        entites = entites_frequentes(df[colonne], top)
+        return entites, construire_profils(df, colonne, entites)
+    entites, profils = chronometre('profils', profiler)
+
+    aretes = chronometre('similarite', aretes_similarite, profils, entites, poids, seuil)
+
+    def composante():
+        G = GrapheCompact(entites)
+        G.ajouter_aretes(*aretes)
+        return G.composante_principale().vers_networkx()
+    G = chronometre('composantes', composante)
+
+    partition = chronometre('communautes', detecter_communautes, G, 0.9, graine)
+    pos = chronometre('disposition', disposition, G, 'barnes_hut', graine=graine)
+    if rendu:
+        import matplotlib.pyplot as plt
+        from rendu import dessiner_reseau_raster
+        fichier = os.path.splitext(chemin)[0] + f"_{entite}.png"
+        chronometre('rendu', dessiner_reseau_raster, G, partition, seuil, fichier=fichier, afficher=False, pos=pos,
+                    entites=PLURIELS[entite])
+        plt.close('all')
+
+    return {
+        'entites': len(entites),
+        'aretes_totales': len(aretes[0]),
+        'noeuds': G.number_of_nodes(),
+        'aretes': G.number_of_edges(),
+        'etapes': temps,
+        'total': sum(temps.values()),
+    }
+
+
+def charger_resultats(fichier):
+    if not os.path.exists(fichier):
+        return []
+    with open(fichier, encoding='utf-8') as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+# Comparer une mesure à la précédente du même cas (entité, taille, seuil) : une étape est en
+# régression si elle est plus lente de plus de `tolerance` (et d'au moins 50 ms)
+def comparer(mesure, historique, tolerance=0.2):
+    cas = ('entite', 'taille', 'seuil')
+    precedentes = [r for r in historique if all(r.get(c) == mesure[c] for c in cas)]
+    if not precedentes:
+        return {}
+    precedente = precedentes[-1]
+    regressions = {}
+    for etape, duree in mesure['etapes'].items():
+        avant = precedente['etapes'].get(etape)
+        if avant and duree > avant * (1 + tolerance) and duree - avant > 0.05:
+            regressions[etape] = {'avant': avant, 'apres': duree, 'version_avant': precedente.get('version')}
+    return regressions
+
+
+def analyser_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline sur des données synthétiques")
+    parser.add_argument('--tailles', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="nombres d'outlets des jeux synthétiques")
+    parser.add_argument('--entites', nargs='+', choices=sorted(ENTITES), default=['outlet', 'keyword', 'country'])
+    parser.add_argument('--lignes-par-outlet', type=int, default=5)
+    # Au seuil des scripts (0.25), le poids 0.4 du pays suffit à relier tous les outlets
+    # d'un même pays unique : le graphe devient quadratique en la taille. Au-dessus de
+    # 0.4, une arête demande aussi des mots-clés communs.
+    parser.add_argument('--seuil', type=float, default=0.5)
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--dossier', default=DOSSIER_BENCHMARK)
+    parser.add_argument('--sans-rendu', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="ralentissement relatif signalé comme régression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = analyser_arguments(argv)
+    import matplotlib
+    matplotlib.use('Agg')
+
+    os.makedirs(args.dossier, exist_ok=True)
+    fichier_resultats = os.path.join(args.dossier, FICHIER_RESULTATS)
+    historique = charger_resultats(fichier_resultats)
+    version = version_code()
+
+    for taille in args.tailles:
+        chemin = os.path.join(args.dossier, f"synthetique_{taille}_{args.lignes_par_outlet}_{args.graine}.tsv")
+        if not os.path.exists(chemin):
+            generer_donnees(chemin, taille, args.lignes_par_outlet, graine=args.graine)
+        # Cache Parquet créé avant les mesures : l'étape de chargement mesure une lecture à chaud
+        charger_donnees(chemin)
+
+        for entite in args.entites:
+            mesure = {
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'version': version,
+                'machine': platform.node(),
+                'python': platform.python_version(),
+                'entite': entite,
+                'taille': taille,
+                'seuil': args.seuil,
+            }
+            mesure.update(mesurer_pipeline(chemin, entite, taille, args.seuil, rendu=not args.sans_rendu,
+                                           graine=args.graine))
+            regressions = comparer(mesure, historique, args.tolerance)
+
+            etapes = "  ".join(f"{e} {d:.2f}s" for e, d in mesure['etapes'].items())
+            print(f"{entite:>8} {taille:>7} : {mesure['noeuds']} nœuds, {mesure['aretes']} arêtes | {etapes}")
+            for etape, r in regressions.items():
+                print(f"    régression {etape} : {r['avant']:.2f}s -> {r['apres']:.2f}s (depuis {r['version_avant']})")
+
+            with open(fichier_resultats, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(mesure, ensure_ascii=False) + "\n")
+            historique.append(mesure)
+
+
+if __name__ == '__main__':
+    main()
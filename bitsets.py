@@ -0,0 +1,60 @@
+import numpy as np
+
+BITS_PAR_MOT = 64
+
+# Au-delà de MOTS_MAX mots uint64 (256 valeurs distinctes), comparer les bitsets
+# devient plus lent que les produits de lignes creuses
+MOTS_MAX = 4
+
+
+# Nombre de bits à 1 de chaque entier uint64 (np.bitwise_count à partir de numpy 2.0,
+# table de comptage par octet sinon)
+if hasattr(np, 'bitwise_count'):
+    def popcount(masques):
+        return np.bitwise_count(masques)
+else:
+    _BITS_OCTET = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(masques):
+        masques = np.ascontiguousarray(masques, dtype=np.uint64)
+        octets = _BITS_OCTET[masques.view(np.uint8)]
+        return octets.reshape(masques.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+# Nombre de mots uint64 pour un vocabulaire de `taille` valeurs
+def nombre_mots(taille):
+    return max(1, -(-taille // BITS_PAR_MOT))
+
+
+# L'attribut (matrice binaire CSR, une colonne par valeur) a-t-il un vocabulaire
+# assez petit pour l'encodage en bitsets ?
+def petit_vocabulaire(matrice, mots_max=MOTS_MAX):
+    return nombre_mots(matrice.shape[1]) <= mots_max
+
+
+# Bitsets des lignes d'une matrice binaire CSR : bit k de l'ensemble = colonne k du
+# vocabulaire. Un vecteur uint64 si le vocabulaire tient en 64 valeurs, sinon un
+# tableau (lignes, mots) de uint64.
+def masques_csr(matrice):
+    n, taille = matrice.shape
+    mots = nombre_mots(taille)
+    colonnes = matrice.indices.astype(np.uint64)
+    lignes = np.repeat(np.arange(n), np.diff(matrice.indptr))
+    bits = np.left_shift(np.uint64(1), colonnes % np.uint64(BITS_PAR_MOT))
+    if mots == 1:
+        masques = np.zeros(n, dtype=np.uint64)
+        np.bitwise_or.at(masques, lignes, bits)
+    else:
+        masques = np.zeros((n, mots), dtype=np.uint64)
+        np.bitwise_or.at(masques, (lignes, (colonnes // np.uint64(BITS_PAR_MOT)).astype(np.int64)), bits)
+    return masques
+
+
+# Tailles d'intersection et d'union des paires (sources[k], cibles[k]) : ET / OU puis
+# comptage de bits, vectorisés sur toutes les paires à la fois
+def intersections_unions(masques, sources, cibles):
+    a, b = masques[sources], masques[cibles]
+    inter, union = popcount(a & b), popcount(a | b)
+    if masques.ndim == 2:
+        return inter.sum(axis=1, dtype=np.int64), union.sum(axis=1, dtype=np.int64)
+    return inter.astype(np.int64), union.astype(np.int64)
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from instrumentation import compter
+from profils import ATTRIBUTS
+from similarite import aretes_similarite, composante_bloc, encoder_profils
+
+DOSSIER_CACHE = "cache_scores"
+TAILLE_MAX_CACHE = 2 * 1024 ** 3  # 2 Go, au-delà on supprime les entrées les moins récentes
+PLANCHER = 0.05
+
+
+# Empreinte du jeu de données (contenu des colonnes utilisées)
+def empreinte_donnees(df, colonnes):
+    hachages = pd.util.hash_pandas_object(df[colonnes], index=False).values
+    return hashlib.sha1(hachages.tobytes()).hexdigest()
+
+
+# Clé d'une entrée du cache : données, sélection d'entités, attributs, mesure et plancher
+def cle_cache(empreinte, entites, mesure, plancher, attributs=ATTRIBUTS):
+    contenu = json.dumps([empreinte, [str(e) for e in entites], list(attributs), mesure, plancher])
+    return hashlib.sha1(contenu.encode('utf-8')).hexdigest()
+
+
+# Scores bruts par attribut (tous, ou ceux de `attributs`) de toutes les paires (i < j)
+# dont au moins une composante dépasse le plancher (tableaux alignés sur la liste de paires)
+def calculer_composantes(profils, entites, mesure='jaccard', plancher=PLANCHER, taille_bloc=2000,
+                         attributs=ATTRIBUTS):
+    matrices, tailles = encoder_profils(profils, entites, attributs)
+    n = len(entites)
+
+    sources, cibles = [], []
+    valeurs = {a: [] for a in attributs}
+    for debut in range(0, n, taille_bloc):
+        fin = min(debut + taille_bloc, n)
+        composantes = {a: sp.triu(composante_bloc(matrices[a], tailles[a], debut, fin, mesure), k=1).tocsr()
+                       for a in attributs}
+        retenues = sum((c > plancher).astype(np.int8) for c in composantes.values()).tocoo()
+        ordre = np.lexsort((retenues.col, retenues.row))
+        lignes, colonnes = retenues.row[ordre], retenues.col[ordre]
+        for a, composante in composantes.items():
+            valeurs[a].append(np.asarray(composante[lignes, colonnes]).ravel())
+        sources.append(debut + lignes)
+        cibles.append(debut + colonnes)
+
+    vide = np.empty(0, dtype=np.int32)
+    resultat = {
+        'sources': np.concatenate(sources).astype(np.int32) if sources else vide,
+        'cibles': np.concatenate(cibles).astype(np.int32) if cibles else vide,
+    }
+    for a in attributs:
+        resultat[a] = np.concatenate(valeurs[a]) if valeurs[a] else np.empty(0)
+    return resultat
+
+
+# Mélange pondéré des composantes puis seuil (même ordre d'addition que scores_bloc)
+def melanger(composantes, poids, seuil):
+    scores = np.zeros(len(composantes['sources']))
+    for attribut, w in poids.items():
+        scores = scores + w * composantes[attribut]
+    garder = (scores >= seuil) & (scores > 0)
+    return composantes['sources'][garder], composantes['cibles'][garder], scores[garder]
+
+
+# Supprimer les entrées les moins récemment utilisées au-delà de la taille maximale
+def _evincer(dossier, taille_max):
+    fichiers = [os.path.join(dossier, f) for f in os.listdir(dossier) if f.endswith('.npz')]
+    fichiers.sort(key=os.path.getmtime, reverse=True)
+    total = 0
+    for fichier in fichiers:
+        total += os.path.getsize(fichier)
+        if total > taille_max:
+            os.remove(fichier)
+
+
+# Arêtes de similarité en passant par le cache des composantes :
+# changer les poids ou le seuil ne demande qu'un nouveau mélange.
+# Seuls les attributs de poids non nul sont calculés et gardés : les années et les langues,
+# à très peu de valeurs distinctes, dépassent le plancher pour presque toutes les paires
+# et rendraient le cache quadratique même quand elles ne comptent pas.
+# Le cache n'est exact que si seuil > plancher * somme des poids ; sinon calcul direct.
+def aretes_en_cache(profils, entites, poids, seuil, empreinte, mesure='jaccard', plancher=PLANCHER,
+                    dossier=DOSSIER_CACHE, taille_max=TAILLE_MAX_CACHE):
+    if plancher > 0 and seuil <= plancher * sum(poids.values()):
+        return aretes_similarite(profils, entites, poids, seuil, mesure)
+    attributs = tuple(a for a in ATTRIBUTS if poids.get(a))
+    poids = {a: poids[a] for a in attributs}
+
+    os.makedirs(dossier, exist_ok=True)
+    fichier = os.path.join(dossier, cle_cache(empreinte, entites, mesure, plancher, attributs) + ".npz")
+    if os.path.exists(fichier):
+        compter('cache_scores_succes')
+        os.utime(fichier)
+        with np.load(fichier) as donnees:
+            composantes = {cle: donnees[cle] for cle in donnees.files}
+    else:
+        compter('cache_scores_echecs')
+        composantes = calculer_composantes(profils, entites, mesure, plancher, attributs=attributs)
+        temporaire = fichier + ".tmp"
+        with open(temporaire, 'wb') as f:
+            np.savez(f, **composantes)
+        os.replace(temporaire, fichier)
+        _evincer(dossier, taille_max)
+    aretes = melanger(composantes, poids, seuil)
+    # Comme dans aretes_similarite : paires scorées, dont celles écartées par le seuil
+    compter('paires_evaluees', len(composantes['sources']))
+    compter('paires_elaguees', len(composantes['sources']) - len(aretes[0]))
+    compter('paires_possibles', len(entites) * (len(entites) - 1) // 2)
+    compter('aretes', len(aretes[0]))
+    return aretes
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from instrumentation import compter
+from profils import analyser_dates, decouper_liste
+
+FICHIER_DONNEES = "euvsdisinfo_v1_2.csv"
+
+# Colonnes stockées en catégories dans le cache
+COLONNES_CATEGORIES = ['outlet', 'country', 'target_language']
+
+# Colonnes dérivées calculées une fois à la création du cache (colonne source -> dérivée)
+COLONNES_DERIVEES = {'keywords': 'liste_mots_cles', 'publication_date': 'date'}
+
+# Version du contenu du cache, à incrémenter quand le calcul des colonnes dérivées change
+VERSION_CACHE = 2
+
+
+# Empreinte du fichier source (taille, date de modification, SHA-1)
+def _empreinte(chemin, avec_hash=True):
+    stat = os.stat(chemin)
+    empreinte = {'taille': stat.st_size, 'mtime': stat.st_mtime}
+    if avec_hash:
+        sha1 = hashlib.sha1()
+        with open(chemin, 'rb') as f:
+            for morceau in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(morceau)
+        empreinte['sha1'] = sha1.hexdigest()
+    return empreinte
+
+
+# SHA-1 du fichier source, pour identifier les données sans les charger
+def empreinte_fichier(chemin):
+    return _empreinte(chemin)['sha1']
+
+
+# Chemins du cache colonne (Parquet) et de ses métadonnées
+def chemins_cache(chemin):
+    base = os.path.splitext(chemin)[0]
+    return base + ".parquet", base + ".parquet.json"
+
+
+# Le cache est valide s'il est de la version courante et si la taille et la date du
+# fichier source n'ont pas changé, ou à défaut si son contenu (SHA-1) est identique
+def cache_valide(chemin):
+    fichier_cache, fichier_meta = chemins_cache(chemin)
+    if not (os.path.exists(fichier_cache) and os.path.exists(fichier_meta)):
+        return False
+    with open(fichier_meta) as f:
+        meta = json.load(f)
+    if meta.get('version') != VERSION_CACHE:
+        return False
+    actuelle = _empreinte(chemin, avec_hash=False)
+    if actuelle['taille'] == meta['taille'] and actuelle['mtime'] == meta['mtime']:
+        return True
+    if actuelle['taille'] == meta['taille'] and _empreinte(chemin)['sha1'] == meta['sha1']:
+        meta['mtime'] = actuelle['mtime']
+        with open(fichier_meta, 'w') as f:
+            json.dump(meta, f)
+        return True
+    return False
+
+
+# Préparer le DataFrame brut : catégories, mots-clés découpés, dates analysées
+def preparer_donnees(df):
+    df = df.copy()
+    for colonne in COLONNES_CATEGORIES:
+        if colonne in df:
+            df[colonne] = df[colonne].astype('category')
+    if 'keywords' in df:
+        jetons = decouper_liste(df['keywords'])
+        listes = jetons.groupby(level=0).agg(list)
+        df['liste_mots_cles'] = [listes.get(i, []) for i in df.index]
+    if 'publication_date' in df:
+        df['date'] = analyser_dates(df['publication_date'])
+    return df
+
+
+# Écrire le cache colonne et l'empreinte du fichier source
+def ecrire_cache(chemin, df):
+    fichier_cache, fichier_meta = chemins_cache(chemin)
+    df.to_parquet(fichier_cache, index=False)
+    with open(fichier_meta, 'w') as f:
+        json.dump({**_empreinte(chemin), 'version': VERSION_CACHE}, f)
+
+
+# Charger les données euvsdisinfo en passant par le cache Parquet
+# colonnes : colonnes sources voulues (leurs colonnes dérivées sont ajoutées), None = toutes
+def charger_donnees(chemin=FICHIER_DONNEES, colonnes=None, cache=True):
+    try:
+        import pyarrow
+    except ImportError:
+        cache = False
+
+    if cache and cache_valide(chemin):
+        compter('cache_donnees_succes')
+    elif cache:
+        compter('cache_donnees_echecs')
+        ecrire_cache(chemin, preparer_donnees(pd.read_csv(chemin, delimiter="\t")))
+
+    if not cache:
+        return preparer_donnees(pd.read_csv(chemin, delimiter="\t", usecols=colonnes))
+
+    if colonnes is not None:
+        colonnes = list(colonnes) + [COLONNES_DERIVEES[c] for c in colonnes if c in COLONNES_DERIVEES]
+    return pd.read_parquet(chemins_cache(chemin)[0], columns=colonnes, memory_map=True)
@@ -0,0 +1,191 @@
+import multiprocessing as mp
+import os
+from itertools import combinations
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+# Méthodes de détection disponibles
+METHODES = ('csr', 'python-louvain', 'leiden')
+
+
+# Matrice d'adjacence pondérée symétrique (CSR) dans l'ordre des nœuds de G
+def adjacence(G, noeuds=None):
+    noeuds = list(G.nodes()) if noeuds is None else noeuds
+    return nx.to_scipy_sparse_array(G, nodelist=noeuds, weight='weight', format='csr'), noeuds
+
+
+# Modularité d'un étiquetage (entiers 0..k-1) sur la matrice d'adjacence A
+def modularite(A, etiquettes, resolution=1.0):
+    A = sp.csr_matrix(A)
+    m2 = A.sum()
+    if m2 == 0:
+        return 0.0
+    degres = np.asarray(A.sum(axis=1)).ravel()
+    nb = etiquettes.max() + 1
+    totaux = np.bincount(etiquettes, weights=degres, minlength=nb)
+    coo = A.tocoo()
+    internes = np.bincount(etiquettes[coo.row], weights=coo.data * (etiquettes[coo.row] == etiquettes[coo.col]),
+                           minlength=nb)
+    return float((internes / m2 - resolution * (totaux / m2) ** 2).sum())
+
+
+# Phase locale de Louvain : chaque nœud rejoint la communauté voisine qui maximise
+# le gain de modularité, jusqu'à ce qu'aucun déplacement n'améliore
+def _deplacements_locaux(A, resolution, rng, tolerance=1e-7):
+    n = A.shape[0]
+    m2 = A.sum()
+    degres = np.asarray(A.sum(axis=1)).ravel()
+    communautes = np.arange(n)
+    totaux = degres.copy()
+    indptr, indices, donnees = A.indptr, A.indices, A.data
+
+    ameliore = False
+    while True:
+        deplaces = 0
+        for i in rng.permutation(n):
+            voisins = indices[indptr[i]:indptr[i + 1]]
+            poids = donnees[indptr[i]:indptr[i + 1]]
+            autres = voisins != i
+            voisins, poids = voisins[autres], poids[autres]
+            actuelle = communautes[i]
+            totaux[actuelle] -= degres[i]
+
+            candidates, inverse = np.unique(communautes[voisins], return_inverse=True)
+            liens = np.bincount(inverse, weights=poids, minlength=len(candidates))
+            gains = liens - resolution * totaux[candidates] * degres[i] / m2
+            position = np.searchsorted(candidates, actuelle)
+            gain_actuel = (liens[position] if position < len(candidates) and candidates[position] == actuelle
+                           else 0.0) - resolution * totaux[actuelle] * degres[i] / m2
+
+            meilleure = actuelle
+            if len(candidates) and gains.max() > gain_actuel + tolerance:
+                meilleure = candidates[np.argmax(gains)]
+                deplaces += 1
+            communautes[i] = meilleure
+            totaux[meilleure] += degres[i]
+        if deplaces == 0:
+            break
+        ameliore = True
+    _, communautes = np.unique(communautes, return_inverse=True)
+    return communautes, ameliore
+
+
+# Louvain sur matrice CSR : déplacements locaux puis agrégation des communautés
+# (A' = Sᵀ A S), jusqu'à stabilité. Renvoie une étiquette entière par nœud.
+def louvain_csr(A, resolution=1.0, graine=42):
+    rng = np.random.default_rng(graine)
+    A = sp.csr_matrix(A, dtype=np.float64)
+    etiquettes = np.arange(A.shape[0])
+    if A.nnz == 0:
+        return etiquettes
+    while True:
+        communautes, ameliore = _deplacements_locaux(A, resolution, rng)
+        if not ameliore:
+            break
+        etiquettes = communautes[etiquettes]
+        S = sp.csr_matrix((np.ones(len(communautes)), (np.arange(len(communautes)), communautes)))
+        A = (S.T @ A @ S).tocsr()
+    return etiquettes
+
+
+# Leiden (igraph + leidenalg, dépendances optionnelles)
+def leiden(A, resolution=1.0, graine=42):
+    try:
+        import igraph as ig
+        import leidenalg
+    except ImportError:
+        raise ImportError("la méthode 'leiden' nécessite les paquets igraph et leidenalg") from None
+
+    coo = sp.triu(A).tocoo()
+    graphe = ig.Graph(n=A.shape[0], edges=list(zip(coo.row.tolist(), coo.col.tolist())))
+    graphe.es['weight'] = coo.data.tolist()
+    partition = leidenalg.find_partition(graphe, leidenalg.RBConfigurationVertexPartition, weights='weight',
+                                         resolution_parameter=resolution, seed=graine)
+    return np.array(partition.membership)
+
+
+# Étiquettes de communautés pour la matrice A selon la méthode choisie
+def etiquettes_communautes(A, resolution=1.0, graine=42, methode='csr'):
+    if methode == 'csr':
+        return louvain_csr(A, resolution, graine)
+    if methode == 'leiden':
+        return leiden(A, resolution, graine)
+    import community as community_louvain
+    G = nx.from_scipy_sparse_array(A)
+    partition = community_louvain.best_partition(G, resolution=resolution, random_state=graine)
+    return np.array([partition[i] for i in range(A.shape[0])])
+
+
+# Détection de communautés sur un graphe networkx, renvoyée comme best_partition
+# (dictionnaire nœud -> numéro de communauté)
+def detecter_communautes(G, resolution=1.0, graine=42, methode='csr'):
+    A, noeuds = adjacence(G)
+    etiquettes = etiquettes_communautes(A, resolution, graine, methode)
+    return dict(zip(noeuds, etiquettes.tolist()))
+
+
+# Indice de Rand ajusté entre deux étiquetages (stabilité d'une partition)
+def rand_ajuste(a, b):
+    n = len(a)
+    if n < 2:
+        return 1.0
+    contingence = sp.coo_matrix((np.ones(n), (a, b))).tocsr()
+    paires = lambda x: (x * (x - 1) / 2).sum()
+    somme = paires(contingence.data)
+    lignes = paires(np.asarray(contingence.sum(axis=1)).ravel())
+    colonnes = paires(np.asarray(contingence.sum(axis=0)).ravel())
+    attendu = lignes * colonnes / (n * (n - 1) / 2)
+    maximum = (lignes + colonnes) / 2
+    return 1.0 if maximum == attendu else float((somme - attendu) / (maximum - attendu))
+
+
+_MATRICE = {}
+
+
+def _executer(tache):
+    resolution, graine, methode = tache
+    A = _MATRICE['A']
+    etiquettes = etiquettes_communautes(A, resolution, graine, methode)
+    return resolution, graine, etiquettes, modularite(A, etiquettes, resolution), modularite(A, etiquettes)
+
+
+# Balayage de résolutions : chaque (résolution, graine) est lancé en parallèle ;
+# pour chaque résolution on rapporte la modularité à cette résolution (moyenne et meilleure),
+# la modularité standard (résolution 1, comparable d'une résolution à l'autre) de la meilleure
+# partition, le nombre de communautés et la stabilité (Rand ajusté moyen entre les graines)
+def balayage_resolutions(G, resolutions, graines=(0, 1, 2, 3), methode='csr', nb_processus=None):
+    A, noeuds = adjacence(G)
+    taches = [(r, g, methode) for r in resolutions for g in graines]
+    _MATRICE['A'] = A
+
+    nb_processus = nb_processus or os.cpu_count()
+    if nb_processus > 1 and 'fork' in mp.get_all_start_methods():
+        with mp.get_context('fork').Pool(min(nb_processus, len(taches))) as pool:
+            resultats = pool.map(_executer, taches)
+    else:
+        resultats = list(map(_executer, taches))
+
+    rapport = []
+    for resolution in resolutions:
+        executions = [r for r in resultats if r[0] == resolution]
+        modularites = [r[3] for r in executions]
+        meilleure = executions[int(np.argmax(modularites))]
+        stabilites = [rand_ajuste(x[2], y[2]) for x, y in combinations(executions, 2)]
+        rapport.append({
+            'resolution': resolution,
+            'modularite_moyenne': float(np.mean(modularites)),
+            'modularite_max': float(max(modularites)),
+            'modularite_standard': float(meilleure[4]),
+            'communautes': int(meilleure[2].max() + 1),
+            'stabilite': float(np.mean(stabilites)) if stabilites else 1.0,
+            'graine': meilleure[1],
+            'partition': dict(zip(noeuds, meilleure[2].tolist())),
+        })
+    return rapport
+
+
+# Choix dans un balayage : la résolution la plus stable entre graines, puis à stabilité égale
+# la meilleure modularité standard (la modularité à chaque résolution n'est pas comparable)
+def choisir_resolution(rapport):
+    return max(rapport, key=lambda r: (r['stabilite'], r['modularite_standard']))
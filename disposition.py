@@ -0,0 +1,187 @@
+import json
+import os
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import eigsh
+
+# Méthodes de layout disponibles
+METHODES = ('spring', 'spectrale', 'barnes_hut')
+
+
+# Matrice d'adjacence pondérée (CSR) dans l'ordre de `noeuds`
+def _adjacence(G, noeuds):
+    return nx.to_scipy_sparse_array(G, nodelist=noeuds, weight='weight', format='csr')
+
+
+# Initialisation spectrale : 2e et 3e vecteurs propres de l'adjacence normalisée
+# (vecteur de départ tiré de la graine pour que le résultat soit reproductible)
+def init_spectrale(A, graine=42):
+    n = A.shape[0]
+    rng = np.random.default_rng(graine)
+    if n <= 3:
+        return rng.random((n, 2))
+    degres = np.asarray(A.sum(axis=1)).ravel()
+    inverse = sp.diags(1 / np.sqrt(np.maximum(degres, 1e-12)))
+    normalisee = inverse @ A @ inverse
+    try:
+        _, vecteurs = eigsh(normalisee, k=3, which='LA', v0=rng.random(n))
+        pos = vecteurs[:, :2]
+    except Exception:
+        return rng.random((n, 2))
+    # Petit bruit pour séparer les nœuds confondus (mêmes voisins)
+    pos = pos + 1e-3 * (pos.std() + 1e-12) * rng.standard_normal(pos.shape)
+    return pos
+
+
+# Ramener des positions dans le carré unité
+def _normaliser(pos):
+    mini = pos.min(axis=0)
+    etendue = (pos.max(axis=0) - mini).max()
+    return (pos - mini) / (etendue if etendue > 0 else 1.0)
+
+
+# Forces de répulsion approchées à la Barnes-Hut sur une hiérarchie de grilles :
+# à chaque niveau, un nœud interagit avec le centre de masse des cellules voisines
+# de sa cellule parente qui ne touchent pas sa propre cellule ; au niveau le plus
+# fin, les cellules voisines (dont la sienne, sans lui-même) sont traitées de même.
+def _repulsion(pos, k, niveaux):
+    n = len(pos)
+    mini = pos.min(axis=0)
+    etendue = max((pos.max(axis=0) - mini).max(), 1e-12) * (1 + 1e-9)
+    relatif = (pos - mini) / etendue
+    force = np.zeros_like(pos)
+    decalages = np.arange(6)
+
+    for niveau in range(1, niveaux + 1):
+        g = 2 ** niveau
+        cellule = np.minimum((relatif * g).astype(np.int64), g - 1)
+        ids = cellule[:, 0] * g + cellule[:, 1]
+        masse = np.bincount(ids, minlength=g * g).astype(np.float64)
+        somme_x = np.bincount(ids, weights=pos[:, 0], minlength=g * g)
+        somme_y = np.bincount(ids, weights=pos[:, 1], minlength=g * g)
+
+        # Cellules enfants des 3x3 voisines de la cellule parente (6x6 candidates)
+        parent = cellule // 2
+        xs = 2 * parent[:, [0]] - 2 + decalages
+        ys = 2 * parent[:, [1]] - 2 + decalages
+        X = np.repeat(xs, 6, axis=1)
+        Y = np.tile(ys, (1, 6))
+        valides = (X >= 0) & (X < g) & (Y >= 0) & (Y < g)
+        proches = (np.abs(X - cellule[:, [0]]) <= 1) & (np.abs(Y - cellule[:, [1]]) <= 1)
+        if niveau < niveaux:
+            valides &= ~proches
+        candidates = np.where(valides, X * g + Y, 0)
+
+        m = np.where(valides, masse[candidates], 0.0)
+        sx = np.where(valides, somme_x[candidates], 0.0)
+        sy = np.where(valides, somme_y[candidates], 0.0)
+        if niveau == niveaux:
+            soi = valides & (candidates == ids[:, None])
+            m = m - soi
+            sx = sx - soi * pos[:, [0]]
+            sy = sy - soi * pos[:, [1]]
+
+        avec_masse = m > 0
+        cx = np.divide(sx, m, out=np.zeros_like(sx), where=avec_masse)
+        cy = np.divide(sy, m, out=np.zeros_like(sy), where=avec_masse)
+        dx = pos[:, [0]] - cx
+        dy = pos[:, [1]] - cy
+        d2 = np.maximum(dx * dx + dy * dy, 1e-9)
+        # Fruchterman-Reingold : répulsion k² / d, dirigée selon (dx, dy)
+        coefficient = np.where(avec_masse, m * k * k / d2, 0.0)
+        force[:, 0] += (coefficient * dx).sum(axis=1)
+        force[:, 1] += (coefficient * dy).sum(axis=1)
+    return force
+
+
+# Attraction le long des arêtes : d² / k, pondérée par le poids de l'arête
+def _attraction(pos, sources, cibles, poids, k):
+    delta = pos[sources] - pos[cibles]
+    distance = np.sqrt((delta ** 2).sum(axis=1))
+    intensite = (distance * poids / k)[:, None] * delta
+    n = len(pos)
+    force = np.zeros_like(pos)
+    for axe in range(2):
+        force[:, axe] -= np.bincount(sources, weights=intensite[:, axe], minlength=n)
+        force[:, axe] += np.bincount(cibles, weights=intensite[:, axe], minlength=n)
+    return force
+
+
+# Layout force-dirigé (Fruchterman-Reingold) avec répulsion approchée, vectorisé numpy
+def barnes_hut(A, pos, iterations=100, temperature=0.1, niveaux=None):
+    n = len(pos)
+    pos = _normaliser(pos)
+    if n < 2:
+        return pos
+    k = np.sqrt(1.0 / n)
+    if niveaux is None:
+        niveaux = int(np.clip(np.ceil(np.log2(np.sqrt(n))) + 1, 1, 10))
+    triangle = sp.triu(A, k=1).tocoo()
+    sources, cibles, poids = triangle.row, triangle.col, triangle.data
+
+    for iteration in range(iterations):
+        deplacement = _repulsion(pos, k, niveaux) + _attraction(pos, sources, cibles, poids, k)
+        longueur = np.maximum(np.sqrt((deplacement ** 2).sum(axis=1)), 1e-12)
+        limite = temperature * (1 - iteration / iterations)
+        pos = pos + deplacement / longueur[:, None] * np.minimum(longueur, limite)[:, None]
+    return pos
+
+
+# Positions de départ reprises d'un layout précédent : les nouveaux nœuds sont placés
+# au barycentre de leurs voisins déjà placés (ou au hasard s'ils n'en ont pas)
+def _demarrage_a_chaud(A, noeuds, pos_initiales, graine):
+    rng = np.random.default_rng(graine)
+    connues = np.array([n in pos_initiales for n in noeuds])
+    pos = np.zeros((len(noeuds), 2))
+    if connues.any():
+        pos[connues] = [pos_initiales[n] for n, c in zip(noeuds, connues) if c]
+    mini, maxi = (pos[connues].min(axis=0), pos[connues].max(axis=0)) if connues.any() else (0.0, 1.0)
+    for i in np.flatnonzero(~connues):
+        voisins = A.indices[A.indptr[i]:A.indptr[i + 1]]
+        voisins = voisins[connues[voisins]]
+        if len(voisins):
+            pos[i] = pos[voisins].mean(axis=0) + 1e-3 * rng.standard_normal(2)
+        else:
+            pos[i] = mini + (maxi - mini) * rng.random(2)
+    return pos
+
+
+# Layout du graphe G selon la méthode choisie, renvoyé comme nx.spring_layout
+# (dictionnaire nœud -> position dans [-1, 1]). Avec pos_initiales, le layout repart
+# des positions connues et converge en quelques itérations (iterations_chaud).
+def disposition(G, methode='barnes_hut', iterations=100, graine=42, pos_initiales=None, iterations_chaud=15):
+    if methode == 'spring':
+        return nx.spring_layout(G, k=0.5, iterations=iterations, seed=graine, pos=pos_initiales)
+
+    noeuds = list(G.nodes())
+    if not noeuds:
+        return {}
+    A = _adjacence(G, noeuds)
+
+    chaud = bool(pos_initiales) and any(n in pos_initiales for n in noeuds)
+    if chaud:
+        pos = _demarrage_a_chaud(A, noeuds, pos_initiales, graine)
+    else:
+        pos = init_spectrale(A, graine)
+
+    if methode == 'barnes_hut':
+        if chaud:
+            pos = barnes_hut(A, pos, iterations=iterations_chaud, temperature=0.02)
+        else:
+            pos = barnes_hut(A, pos, iterations=iterations)
+    pos = nx.rescale_layout(pos, scale=1)
+    return dict(zip(noeuds, pos))
+
+
+# Cache de positions entre deux rendus (JSON nœud -> [x, y])
+def charger_positions(fichier):
+    if not fichier or not os.path.exists(fichier):
+        return None
+    with open(fichier, encoding='utf-8') as f:
+        return {n: np.array(p) for n, p in json.load(f).items()}
+
+
+def sauver_positions(pos, fichier):
+    with open(fichier, 'w', encoding='utf-8') as f:
+        json.dump({str(n): [float(x), float(y)] for n, (x, y) in pos.items()}, f)
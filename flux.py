@@ -0,0 +1,42 @@
+import pandas as pd
+from chargement import FICHIER_DONNEES
+from profils import ATTRIBUTS, COLONNES_PROFIL, construire_profils, pays_principal
+
+# Nombre de lignes lues à la fois
+TAILLE_MORCEAU = 100_000
+
+
+# Ajouter les profils d'un morceau aux profils cumulés : comptes additionnés,
+# ensembles réunis, première ligne gardée depuis la première apparition
+def fusionner_profils(cumul, profils):
+    for entite, profil in profils.items():
+        existant = cumul.get(entite)
+        if existant is None:
+            cumul[entite] = profil
+            continue
+        existant.nb_lignes += profil.nb_lignes
+        for attribut in ATTRIBUTS:
+            getattr(existant, attribut).update(getattr(profil, attribut))
+    return cumul
+
+
+# Profils de toutes les entités d'une colonne, construits en lisant le fichier par
+# morceaux : seuls les profils agrégés restent en mémoire, jamais les lignes brutes.
+# Les entités sont rangées par ordre de première apparition dans le fichier.
+def profils_en_flux(chemin=FICHIER_DONNEES, colonne='outlet', taille_morceau=TAILLE_MORCEAU):
+    sources = list(COLONNES_PROFIL)
+    if colonne not in sources and colonne != 'normalized_country':
+        sources.append(colonne)
+
+    cumul = {}
+    for morceau in pd.read_csv(chemin, delimiter="\t", usecols=sources, chunksize=taille_morceau):
+        if colonne == 'normalized_country':
+            morceau['normalized_country'] = pays_principal(morceau['country'])
+        fusionner_profils(cumul, construire_profils(morceau, colonne))
+    return cumul
+
+
+# Les n entités les plus fréquentes d'après les comptes des profils
+# (même ordre que entites_frequentes sur la colonne complète)
+def entites_frequentes_profils(profils, n=None):
+    return sorted(profils, key=lambda e: profils[e].nb_lignes, reverse=True)[:n]
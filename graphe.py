@@ -0,0 +1,115 @@
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+
+# Graphe non orienté pondéré pour la construction : les nœuds sont internés en
+# identifiants int32 et les arêtes accumulées dans des tableaux numpy (COO) qui
+# grandissent par doublement, puis compactés en CSR à la demande. La conversion
+# vers networkx n'a lieu que pour les étapes qui en ont besoin (rendu, export).
+class GrapheCompact:
+    def __init__(self, noeuds=(), capacite=1024):
+        self.noeuds = []
+        self.identifiants = {}
+        self._sources = np.empty(capacite, dtype=np.int32)
+        self._cibles = np.empty(capacite, dtype=np.int32)
+        self._poids = np.empty(capacite, dtype=np.float64)
+        self._nb_aretes = 0
+        self._csr = None
+        self.ajouter_noeuds(noeuds)
+
+    def number_of_nodes(self):
+        return len(self.noeuds)
+
+    def number_of_edges(self):
+        A = self.csr()
+        return (A.nnz + np.count_nonzero(A.diagonal())) // 2
+
+    # Identifiants des nœuds (créés s'ils n'existent pas encore)
+    def ajouter_noeuds(self, noeuds):
+        ids = []
+        for noeud in noeuds:
+            if noeud not in self.identifiants:
+                self.identifiants[noeud] = len(self.noeuds)
+                self.noeuds.append(noeud)
+            ids.append(self.identifiants[noeud])
+        return np.array(ids, dtype=np.int32)
+
+    def _reserver(self, nombre):
+        besoin = self._nb_aretes + nombre
+        if besoin > len(self._sources):
+            capacite = max(besoin, 2 * len(self._sources))
+            for nom in ('_sources', '_cibles', '_poids'):
+                ancien = getattr(self, nom)
+                nouveau = np.empty(capacite, dtype=ancien.dtype)
+                nouveau[:self._nb_aretes] = ancien[:self._nb_aretes]
+                setattr(self, nom, nouveau)
+
+    # Arêtes données par identifiants de nœuds (tableaux alignés, comme les moteurs de similarité)
+    def ajouter_aretes(self, sources, cibles, poids):
+        nombre = len(sources)
+        self._reserver(nombre)
+        fin = self._nb_aretes + nombre
+        self._sources[self._nb_aretes:fin] = sources
+        self._cibles[self._nb_aretes:fin] = cibles
+        self._poids[self._nb_aretes:fin] = poids
+        self._nb_aretes = fin
+        self._csr = None
+
+    # Arête unique donnée par noms de nœuds (équivalent de G.add_edge(u, v, weight=poids))
+    def add_edge(self, u, v, weight=1.0):
+        i, j = self.ajouter_noeuds((u, v))
+        self.ajouter_aretes([i], [j], [weight])
+
+    # Matrice d'adjacence symétrique (CSR). Comme avec networkx, une arête ajoutée
+    # plusieurs fois garde son dernier poids.
+    def csr(self):
+        if self._csr is None:
+            n = len(self.noeuds)
+            s = self._sources[:self._nb_aretes]
+            c = self._cibles[:self._nb_aretes]
+            bas, haut = np.minimum(s, c), np.maximum(s, c)
+            ordre = np.lexsort((np.arange(self._nb_aretes), haut, bas))
+            bas, haut, poids = bas[ordre], haut[ordre], self._poids[:self._nb_aretes][ordre]
+            derniers = np.ones(len(bas), dtype=bool)
+            derniers[:-1] = (bas[1:] != bas[:-1]) | (haut[1:] != haut[:-1])
+            bas, haut, poids = bas[derniers], haut[derniers], poids[derniers]
+            boucles = bas == haut
+            lignes = np.concatenate([bas, haut[~boucles]])
+            colonnes = np.concatenate([haut, bas[~boucles]])
+            self._csr = sp.csr_matrix((np.concatenate([poids, poids[~boucles]]), (lignes, colonnes)), shape=(n, n))
+        return self._csr
+
+    # Étiquette de composante connexe de chaque nœud
+    def composantes(self):
+        return connected_components(self.csr(), directed=False)[1]
+
+    # Sous-graphe induit par des identifiants de nœuds (ordre des nœuds conservé)
+    def sous_graphe(self, ids):
+        ids = np.sort(np.asarray(ids))
+        A = self.csr()[ids][:, ids]
+        haut = sp.triu(A).tocoo()
+        sous = GrapheCompact([self.noeuds[i] for i in ids], capacite=max(haut.nnz, 1))
+        sous.ajouter_aretes(haut.row, haut.col, haut.data)
+        return sous
+
+    # Plus grand composant connexe (à taille égale, celui du premier nœud, comme
+    # max(nx.connected_components(G), key=len))
+    def composante_principale(self):
+        if not self.noeuds:
+            return self
+        etiquettes = self.composantes()
+        principale = np.argmax(np.bincount(etiquettes))
+        return self.sous_graphe(np.flatnonzero(etiquettes == principale))
+
+    # Conversion en nx.Graph (nœuds dans l'ordre d'insertion, attribut 'weight')
+    def vers_networkx(self):
+        G = nx.Graph()
+        G.add_nodes_from(self.noeuds)
+        haut = sp.triu(self.csr()).tocoo()
+        noeuds = self.noeuds
+        G.add_weighted_edges_from(
+            (noeuds[i], noeuds[j], w) for i, j, w in zip(haut.row.tolist(), haut.col.tolist(), haut.data.tolist())
+        )
+        return G
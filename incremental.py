@@ -0,0 +1,96 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from instrumentation import compter
+from profils import COLONNES_PROFIL, construire_profils
+from similarite import aretes_similarite, encoder_profils, scores_lignes
+
+
+# Empreinte des lignes de chaque entité : (somme des hachages de ses lignes, nombre de lignes)
+# Toute ligne ajoutée, supprimée ou modifiée change l'empreinte de son entité.
+def empreintes_entites(df, colonne):
+    colonnes = [colonne] + [c for c in COLONNES_PROFIL if c != colonne]
+    df = df[df[colonne].notna()]
+    hachages = pd.util.hash_pandas_object(df[colonnes], index=False)
+    groupes = hachages.groupby(df[colonne].astype(object), sort=False)
+    sommes = groupes.sum()
+    nombres = groupes.count()
+    return {entite: (int(somme), int(nombre)) for entite, somme, nombre in
+            zip(sommes.index, sommes.values, nombres.values)}
+
+
+def _charger_etat(fichier_etat):
+    if not os.path.exists(fichier_etat):
+        return None
+    with open(fichier_etat, 'rb') as f:
+        return pickle.load(f)
+
+
+def _sauver_etat(fichier_etat, etat):
+    temporaire = fichier_etat + ".tmp"
+    with open(temporaire, 'wb') as f:
+        pickle.dump(etat, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporaire, fichier_etat)
+
+
+# Mettre à jour le graphe de similarité à partir de l'état enregistré au lancement
+# précédent : seules les entités dont les lignes ont changé (ou nouvelles dans la
+# sélection) sont recalculées, contre toutes les autres.
+# Renvoie (profils, aretes, entites_recalculees) ; les arêtes sont identiques à une
+# reconstruction complète avec aretes_similarite.
+def mettre_a_jour_graphe(df, colonne, entites, poids, seuil, mesure='jaccard', fichier_etat='graphe_incremental.pkl'):
+    parametres = {'colonne': colonne, 'poids': dict(poids), 'seuil': seuil, 'mesure': mesure}
+    empreintes = empreintes_entites(df, colonne)
+    etat = _charger_etat(fichier_etat)
+
+    # Premier lancement ou paramètres différents : reconstruction complète
+    if etat is None or etat['parametres'] != parametres:
+        profils = construire_profils(df, colonne, entites)
+        aretes = aretes_similarite(profils, entites, poids, seuil, mesure)
+        modifiees = list(entites)
+    else:
+        anciennes = etat['entites']
+        modifiees = [e for e in entites
+                     if e not in etat['profils'] or empreintes.get(e) != etat['empreintes'].get(e)]
+        profils = {e: etat['profils'][e] for e in entites if e in etat['profils']}
+        profils.update(construire_profils(df, colonne, modifiees))
+        a_recalculer = set(modifiees)
+
+        # Arêtes conservées : entre entités toujours sélectionnées et non modifiées
+        position = {e: i for i, e in enumerate(entites)}
+        a_garder = np.array([e in position and e not in a_recalculer for e in anciennes], dtype=bool)
+        sources, cibles, scores = etat['aretes']
+        garder = a_garder[sources] & a_garder[cibles]
+        remap = np.array([position.get(e, -1) for e in anciennes], dtype=np.int64)
+        sources, cibles, scores = remap[sources[garder]], remap[cibles[garder]], scores[garder]
+
+        # Nouvelles arêtes : entités modifiées contre toutes les entités
+        if modifiees:
+            matrices, tailles = encoder_profils(profils, entites, poids)
+            lignes = np.array([position[e] for e in modifiees])
+            bloc = scores_lignes(matrices, tailles, poids, lignes, mesure).tocoo()
+            i, j = lignes[bloc.row], bloc.col
+            # Les paires entre deux entités modifiées apparaissent deux fois : on n'en garde qu'une
+            modifie = np.zeros(len(entites), dtype=bool)
+            modifie[lignes] = True
+            retenir = (bloc.data >= seuil) & (i != j) & (~modifie[j] | (i < j))
+            nouvelles_sources = np.minimum(i, j)[retenir]
+            nouvelles_cibles = np.maximum(i, j)[retenir]
+            sources = np.concatenate([sources, nouvelles_sources])
+            cibles = np.concatenate([cibles, nouvelles_cibles])
+            scores = np.concatenate([scores, bloc.data[retenir]])
+
+        ordre = np.lexsort((cibles, sources))
+        aretes = sources[ordre], cibles[ordre], scores[ordre]
+
+    _sauver_etat(fichier_etat, {
+        'parametres': parametres,
+        'entites': list(entites),
+        'empreintes': {e: empreintes[e] for e in entites if e in empreintes},
+        'profils': profils,
+        'aretes': aretes,
+    })
+    compter('entites_recalculees', len(modifiees))
+    compter('aretes', len(aretes[0]))
+    return profils, aretes, modifiees
@@ -0,0 +1,65 @@
+import numpy as np
+from collections import defaultdict
+from instrumentation import compter
+from similarite import encoder_profils, scores_paires
+
+
+# Index inversé d'un attribut : jeton -> liste des entités (indices) qui le possèdent
+def construire_index(ensembles):
+    index = defaultdict(list)
+    for i, ensemble in enumerate(ensembles):
+        for jeton in ensemble:
+            index[jeton].append(i)
+    return {jeton: np.array(entites, dtype=np.int64) for jeton, entites in index.items()}
+
+
+# Paires (i < j) qui partagent au moins un jeton, avec le nombre de jetons partagés
+# par attribut. `ensembles` : attribut -> liste d'ensembles alignée sur les entités.
+# taille_max_liste : les jetons trop fréquents (mots vides) sont ignorés ; laisser à
+# None pour retrouver exactement les paires de la double boucle.
+def paires_partagees(ensembles, taille_max_liste=None):
+    n = max((len(e) for e in ensembles.values()), default=0)
+    comptes_par_attribut = {}
+    for attribut, liste in ensembles.items():
+        codes = []
+        for entites in construire_index(liste).values():
+            m = len(entites)
+            if m < 2 or (taille_max_liste is not None and m > taille_max_liste):
+                continue
+            i, j = np.triu_indices(m, k=1)
+            codes.append(entites[i] * n + entites[j])
+        if codes:
+            comptes_par_attribut[attribut] = np.unique(np.concatenate(codes), return_counts=True)
+        else:
+            comptes_par_attribut[attribut] = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    tous = [codes for codes, _ in comptes_par_attribut.values()]
+    paires = np.unique(np.concatenate(tous)) if tous else np.empty(0, dtype=np.int64)
+    comptes = {}
+    for attribut, (codes, nombres) in comptes_par_attribut.items():
+        alignes = np.zeros(len(paires), dtype=np.int64)
+        alignes[np.searchsorted(paires, codes)] = nombres
+        comptes[attribut] = alignes
+    return paires // max(n, 1), paires % max(n, 1), comptes
+
+
+# Arêtes par index inversé : seules les paires partageant un jeton sont candidates,
+# celles dont le score maximal possible (somme des poids des attributs partagés)
+# reste sous le seuil sont écartées, puis les autres reçoivent le score exact.
+def aretes_index(profils, entites, poids, seuil, mesure='jaccard', taille_max_liste=None):
+    ensembles = {a: [getattr(profils[e], a) for e in entites] for a in poids}
+    sources, cibles, comptes = paires_partagees(ensembles, taille_max_liste)
+    compter('paires_candidates', len(sources))
+
+    if mesure == 'jaccard':
+        borne = sum(w * (comptes[a] > 0) for a, w in poids.items())
+        possibles = borne >= seuil
+        compter('paires_elaguees', len(sources) - possibles.sum())
+        sources, cibles = sources[possibles], cibles[possibles]
+
+    matrices, tailles = encoder_profils(profils, entites, poids)
+    scores = scores_paires(matrices, tailles, poids, sources, cibles, mesure)
+    garder = (scores >= seuil) & (scores > 0)
+    compter('paires_evaluees', len(sources))
+    compter('aretes', garder.sum())
+    return sources[garder], cibles[garder], scores[garder]
@@ -0,0 +1,185 @@
+import cProfile
+import json
+import os
+import platform
+import pstats
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Rapport en cours d'enregistrement (les fonctions compter et etape ne font rien sans lui)
+_RAPPORT = None
+
+
+# Version du code mesuré (commit git courant, s'il y en a un)
+def version_code():
+    try:
+        sortie = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return sortie.stdout.strip() or None
+    except OSError:
+        return None
+
+
+# Remettre à zéro le pic de mémoire résidente du processus (Linux uniquement)
+def reinitialiser_pic_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+# Pic de mémoire résidente (Mo) : depuis la dernière remise à zéro sous Linux,
+# depuis le début du processus ailleurs
+def pic_rss():
+    try:
+        with open('/proc/self/status') as f:
+            for ligne in f:
+                if ligne.startswith('VmHWM:'):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / 1024 ** 2 if platform.system() == 'Darwin' else pic / 1024
+
+
+# Rapport d'exécution : durée, temps CPU, pic de mémoire et compteurs de chaque étape,
+# écrit en JSON à côté des sorties. Les étapes nommées dans `profiler` passent sous
+# cProfile (fichier .prof dans `dossier` et fonctions les plus coûteuses dans le rapport),
+# celles nommées dans `tracer` sous tracemalloc (pic et principaux sites d'allocation).
+class RapportExecution:
+    def __init__(self, nom, parametres=None, dossier=None, profiler=(), tracer=()):
+        self.nom = nom
+        self.parametres = parametres or {}
+        self.dossier = dossier
+        self.profiler = set(profiler)
+        self.tracer = set(tracer)
+        self.etapes = []
+        self.compteurs = {}
+        self._pile = []
+        self._debut = None
+        self._date = None
+        self._precedent = None
+        self._pic = 0.0
+        self._duree = None
+
+    # Le rapport devient celui qui reçoit les compteurs et étapes (utilisable avec `with`)
+    def demarrer(self):
+        global _RAPPORT
+        self._precedent, _RAPPORT = _RAPPORT, self
+        self._date = datetime.now().isoformat(timespec='seconds')
+        self._debut = time.perf_counter()
+        return self
+
+    def terminer(self):
+        global _RAPPORT
+        if _RAPPORT is self:
+            _RAPPORT = self._precedent
+        self._duree = time.perf_counter() - self._debut
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.terminer()
+        return False
+
+    def compter(self, nom, valeur=1):
+        self.compteurs[nom] = self.compteurs.get(nom, 0) + valeur
+        if self._pile:
+            compteurs = self._pile[-1]['compteurs']
+            compteurs[nom] = compteurs.get(nom, 0) + valeur
+
+    @contextmanager
+    def etape(self, nom):
+        mesure = {'nom': nom, 'parent': self._pile[-1]['nom'] if self._pile else None, 'compteurs': {}}
+        self._pile.append(mesure)
+        profileur = cProfile.Profile() if nom in self.profiler else None
+        trace = nom in self.tracer
+        demarre = trace and not tracemalloc.is_tracing()
+        if demarre:
+            tracemalloc.start()
+        elif trace:
+            tracemalloc.reset_peak()
+        reinitialiser_pic_rss()
+        debut, cpu = time.perf_counter(), time.process_time()
+        if profileur:
+            profileur.enable()
+        try:
+            yield mesure
+        finally:
+            if profileur:
+                profileur.disable()
+            mesure['duree_s'] = time.perf_counter() - debut
+            mesure['cpu_s'] = time.process_time() - cpu
+            # Le pic d'une sous-étape a remis le compteur à zéro : on le reporte sur le parent
+            pics = [p for p in (pic_rss(), mesure.pop('_pic_sous_etapes', None)) if p is not None]
+            mesure['rss_max_mo'] = max(pics) if pics else None
+            if profileur:
+                mesure['profil'] = self._resume_profil(profileur, nom)
+            if trace:
+                mesure['tracemalloc_max_mo'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+                allocations = tracemalloc.take_snapshot().statistics('lineno')[:10]
+                mesure['allocations'] = [{'site': str(a.traceback), 'taille_mo': a.size / 1024 ** 2, 'blocs': a.count}
+                                         for a in allocations]
+                if demarre:
+                    tracemalloc.stop()
+            self._pile.pop()
+            if mesure['rss_max_mo'] is not None:
+                self._pic = max(self._pic, mesure['rss_max_mo'])
+                if self._pile:
+                    parent = self._pile[-1]
+                    parent['_pic_sous_etapes'] = max(parent.get('_pic_sous_etapes', 0), mesure['rss_max_mo'])
+            self.etapes.append(mesure)
+
+    # Fonctions les plus coûteuses (temps cumulé) d'une étape profilée
+    def _resume_profil(self, profileur, nom, nombre=15):
+        if self.dossier:
+            os.makedirs(self.dossier, exist_ok=True)
+            profileur.dump_stats(os.path.join(self.dossier, f"profil_{nom}.prof"))
+        statistiques = pstats.Stats(profileur).sort_stats('cumulative')
+        resume = []
+        for (fichier, ligne, fonction), (_, appels, _, cumule, _) in statistiques.stats.items():
+            resume.append({'fonction': f"{os.path.basename(fichier)}:{ligne}({fonction})", 'appels': appels,
+                           'temps_cumule_s': cumule})
+        return sorted(resume, key=lambda r: r['temps_cumule_s'], reverse=True)[:nombre]
+
+    def resume(self):
+        return {
+            'nom': self.nom,
+            'date': self._date,
+            'version': version_code(),
+            'machine': platform.node(),
+            'python': platform.python_version(),
+            'parametres': self.parametres,
+            'duree_totale_s': self._duree if self._duree is not None else time.perf_counter() - self._debut,
+            'rss_max_mo': max(pic_rss() or 0.0, self._pic) or None,
+            'compteurs': self.compteurs,
+            'etapes': self.etapes,
+        }
+
+    def ecrire(self, fichier):
+        dossier = os.path.dirname(fichier)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        with open(fichier, 'w', encoding='utf-8') as f:
+            json.dump(self.resume(), f, ensure_ascii=False, indent=2, default=str)
+
+
+# Incrémenter un compteur du rapport en cours (paires évaluées, arêtes, accès au cache...)
+def compter(nom, valeur=1):
+    if _RAPPORT is not None:
+        _RAPPORT.compter(nom, int(valeur))
+
+
+# Étape chronométrée du rapport en cours (sans effet s'il n'y a pas de rapport)
+def etape(nom):
+    return _RAPPORT.etape(nom) if _RAPPORT is not None else nullcontext()
@@ -0,0 +1,149 @@
+import numpy as np
+from instrumentation import compter
+from index_inverse import paires_partagees
+from similarite import encoder_profils, matrice_binaire, scores_paires, aretes_similarite
+
+# Nombre premier de Mersenne pour le hachage universel (a * x + b) mod p
+PREMIER = (1 << 31) - 1
+
+
+# Probabilité qu'une paire de Jaccard s devienne candidate avec b bandes de r lignes
+def probabilite_candidate(s, bandes, lignes):
+    return 1 - (1 - s ** lignes) ** bandes
+
+
+# Ensembles de jetons utilisés pour le MinHash (par défaut, les mots-clés)
+# Les jetons sont préfixés par leur attribut pour ne pas confondre les vocabulaires.
+def _ensembles_jetons(profils, entites, attributs):
+    ensembles = []
+    for e in entites:
+        ensembles.append({(a, v) for a in attributs for v in getattr(profils[e], a)})
+    return ensembles
+
+
+# Signatures MinHash (une ligne par ensemble, une colonne par fonction de hachage)
+# Les ensembles vides gardent la valeur maximale PREMIER.
+def signatures_minhash(ensembles, nb_hachages, graine=42):
+    # Vocabulaire trié pour que les signatures ne dépendent pas de l'ordre des sets
+    vocabulaire = {v: i for i, v in enumerate(sorted(set().union(*ensembles)))}
+    matrice, _ = matrice_binaire(ensembles, vocabulaire)
+    rng = np.random.default_rng(graine)
+    a = rng.integers(1, PREMIER, size=(nb_hachages, 1), dtype=np.int64)
+    b = rng.integers(0, PREMIER, size=(nb_hachages, 1), dtype=np.int64)
+
+    signatures = np.full((matrice.shape[0], nb_hachages), PREMIER, dtype=np.int64)
+    non_vides = np.flatnonzero(np.diff(matrice.indptr) > 0)
+    if len(non_vides):
+        hachages = (a * matrice.indices.astype(np.int64) + b) % PREMIER
+        minima = np.minimum.reduceat(hachages, matrice.indptr[non_vides], axis=1)
+        signatures[non_vides] = minima.T
+    return signatures
+
+
+# Paires candidates (i < j) : entités qui partagent au moins une bande de signature
+def paires_candidates(signatures, bandes, lignes):
+    n = signatures.shape[0]
+    non_vides = np.flatnonzero(signatures[:, 0] != PREMIER)
+    codes = []
+    for bande in range(bandes):
+        cles = signatures[non_vides, bande * lignes:(bande + 1) * lignes]
+        _, seaux = np.unique(cles, axis=0, return_inverse=True)
+        seaux = seaux.ravel()
+        ordre = np.argsort(seaux, kind='stable')
+        membres, seaux = non_vides[ordre], seaux[ordre]
+        # Chaque membre est apparié aux suivants de son seau (indices croissants dans le
+        # seau grâce au tri stable) : paires générées sans boucle sur les seaux
+        fins = np.searchsorted(seaux, seaux, side='right')
+        suivants = fins - np.arange(len(seaux)) - 1
+        total = int(suivants.sum())
+        if total:
+            positions = np.repeat(np.arange(len(seaux)), suivants)
+            decalages = np.arange(total) - np.repeat(np.cumsum(suivants) - suivants, suivants)
+            codes.append(membres[positions] * n + membres[positions + 1 + decalages])
+    # Doublons d'une bande à l'autre : tri en place puis suppression des répétitions
+    codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int64)
+    codes.sort()
+    codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))] if len(codes) else codes
+    return codes // max(n, 1), codes % max(n, 1)
+
+
+# Paires candidates par MinHash en bandes sur les attributs choisis
+def candidates_lsh(profils, entites, bandes=20, lignes=5, attributs=('mots_cles',), graine=42):
+    signatures = signatures_minhash(_ensembles_jetons(profils, entites, attributs), bandes * lignes, graine)
+    return paires_candidates(signatures, bandes, lignes)
+
+
+# Paires qui atteignent le seuil sur les seuls attributs pondérés non hachés (index
+# inversé exact, même borne que aretes_index) : le MinHash ne les voit pas. Avec les
+# poids 0.6 mots-clés / 0.4 pays et un seuil de 0.25, un pays commun suffit par exemple.
+def candidates_non_hachees(profils, entites, poids, seuil, attributs=('mots_cles',), mesure='jaccard'):
+    autres = {a: w for a, w in poids.items() if a not in attributs}
+    vide = np.empty(0, dtype=np.int64)
+    if not autres or (mesure != 'intersection' and sum(autres.values()) < seuil):
+        return vide, vide
+    sources, cibles, comptes = paires_partagees({a: [getattr(profils[e], a) for e in entites] for a in autres})
+    if mesure == 'intersection':
+        borne = sum(w * comptes[a] for a, w in autres.items())
+    else:
+        borne = sum(w * (comptes[a] > 0) for a, w in autres.items())
+    possibles = borne >= seuil
+    return sources[possibles], cibles[possibles]
+
+
+# Candidates du MinHash complétées par celles des attributs non hachés
+def candidates_completees(profils, entites, poids, seuil, bandes=20, lignes=5, attributs=('mots_cles',), graine=42,
+                          mesure='jaccard'):
+    n = max(len(entites), 1)
+    sources, cibles = candidates_lsh(profils, entites, bandes, lignes, attributs, graine)
+    autres_sources, autres_cibles = candidates_non_hachees(profils, entites, poids, seuil, attributs, mesure)
+    codes = np.union1d(sources * n + cibles, autres_sources * n + autres_cibles)
+    return codes // n, codes % n
+
+
+# Score exact des paires candidates (même mélange pondéré que aretes_similarite)
+def _aretes_candidates(profils, entites, poids, seuil, sources, cibles, mesure='jaccard'):
+    n = len(entites)
+    compter('paires_possibles', n * (n - 1) // 2)
+    compter('paires_candidates', len(sources))
+
+    matrices, tailles = encoder_profils(profils, entites, poids)
+    scores = scores_paires(matrices, tailles, poids, sources, cibles, mesure)
+    garder = (scores >= seuil) & (scores > 0)
+    compter('paires_evaluees', len(sources))
+    compter('paires_elaguees', len(sources) - garder.sum())
+    compter('aretes', garder.sum())
+    return sources[garder], cibles[garder], scores[garder]
+
+
+# Arêtes par LSH : MinHash en bandes (et index exact des attributs non hachés) pour
+# proposer les paires, puis score exact sur les seules candidates
+def aretes_lsh(profils, entites, poids, seuil, bandes=20, lignes=5, attributs=('mots_cles',), graine=42, mesure='jaccard'):
+    sources, cibles = candidates_completees(profils, entites, poids, seuil, bandes, lignes, attributs, graine, mesure)
+    return _aretes_candidates(profils, entites, poids, seuil, sources, cibles, mesure)
+
+
+# Rappel du LSH par rapport au calcul exhaustif, sur un échantillon d'entités
+# (pour régler le nombre de bandes et de lignes)
+def rappel_lsh(profils, entites, poids, seuil, bandes=20, lignes=5, taille_echantillon=1000, attributs=('mots_cles',), graine=42,
+               mesure='jaccard'):
+    rng = np.random.default_rng(graine)
+    taille = min(taille_echantillon, len(entites))
+    echantillon = [entites[i] for i in sorted(rng.choice(len(entites), size=taille, replace=False))]
+
+    exactes = aretes_similarite(profils, echantillon, poids, seuil, mesure)
+    candidates = candidates_completees(profils, echantillon, poids, seuil, bandes, lignes, attributs, graine, mesure)
+    approchees = _aretes_candidates(profils, echantillon, poids, seuil, *candidates, mesure=mesure)
+
+    paires_exactes = set(zip(exactes[0].tolist(), exactes[1].tolist()))
+    paires_lsh = set(zip(approchees[0].tolist(), approchees[1].tolist()))
+    retrouvees = len(paires_exactes & paires_lsh)
+    return {
+        'entites': taille,
+        'bandes': bandes,
+        'lignes': lignes,
+        'paires_candidates': len(candidates[0]),
+        'paires_totales': taille * (taille - 1) // 2,
+        'aretes_exactes': len(paires_exactes),
+        'aretes_lsh': len(paires_lsh),
+        'rappel': retrouvees / len(paires_exactes) if paires_exactes else 1.0,
+    }
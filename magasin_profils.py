@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from profils import ATTRIBUTS, COLONNES_PREMIERE_LIGNE, Profil
+
+# Version du format (à changer si la disposition des fichiers change)
+VERSION_MAGASIN = 1
+FICHIER_META = "magasin.json"
+# Fichier du dossier d'un magasin qui désigne la version publiée (sous-dossier)
+FICHIER_VERSION = "ACTUELLE"
+# Une version remplacée n'est supprimée que DELAI_SUPPRESSION secondes après la
+# publication de la suivante (le temps qu'un processus qui venait de la choisir s'y attache)
+DELAI_SUPPRESSION = 60
+
+
+# Dossier de la version publiée d'un magasin (le dossier lui-même pour un magasin écrit
+# avant l'introduction des versions)
+def version_actuelle(dossier):
+    try:
+        with open(os.path.join(dossier, FICHIER_VERSION), encoding='utf-8') as f:
+            return os.path.join(dossier, f.read().strip())
+    except OSError:
+        return dossier
+
+
+# Supprimer les versions remplacées depuis plus de `delai` secondes (les noms de version
+# commencent par leur date de création en nanosecondes), sauf la version publiée ; les
+# fichiers d'un magasin sans versions, à la racine du dossier, sont remplacés par la
+# première version et supprimés de la même façon
+def _nettoyer_versions(dossier, publiee, delai=DELAI_SUPPRESSION):
+    versions = sorted((int(nom[1:].split('_')[0]), nom) for nom in os.listdir(dossier)
+                      if nom.startswith('v') and os.path.isdir(os.path.join(dossier, nom)))
+    limite = time.time_ns() - delai * 10 ** 9
+    for (_, nom), (suivante, _) in zip(versions, versions[1:]):
+        if nom != publiee and suivante < limite:
+            shutil.rmtree(os.path.join(dossier, nom), ignore_errors=True)
+    if versions and versions[0][0] < limite:
+        for nom in os.listdir(dossier):
+            if nom == FICHIER_META or nom.endswith('.npy'):
+                try:
+                    os.remove(os.path.join(dossier, nom))
+                except FileNotFoundError:
+                    pass
+
+
+# Table de chaînes internées (UTF-8 mis bout à bout + décalages) à partir de la liste
+# des chaînes dans l'ordre de leurs identifiants
+def _table_chaines(chaines):
+    encodees = [c.encode('utf-8') for c in chaines]
+    decalages = np.zeros(len(encodees) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encodees], out=decalages[1:])
+    octets = np.frombuffer(b''.join(encodees), dtype=np.uint8)
+    return decalages, octets
+
+
+# Écrire les profils de `entites` (dans cet ordre) en tableaux numpy plats :
+# - table de chaînes internées (noms d'entités, valeurs d'attributs, premières lignes) ;
+# - pour chaque attribut, décalages CSR et identifiants de jetons triés par ligne
+#   (les années sont internées comme les autres valeurs) ;
+# - nombres de lignes et identifiants des valeurs brutes de la première ligne (-1 si absente).
+# Chaque écriture crée une nouvelle version (sous-dossier) puis la publie en remplaçant
+# le fichier ACTUELLE par os.replace, atomique : un processus qui s'attache voit l'ancienne
+# version ou la nouvelle, jamais un dossier absent ou incomplet. Les versions remplacées
+# sont supprimées après DELAI_SUPPRESSION secondes ; les processus déjà attachés gardent
+# leurs projections même après la suppression des fichiers.
+def ecrire_magasin(profils, entites, dossier, empreinte=None):
+    identifiants = {}
+
+    def interner(chaine):
+        return identifiants.setdefault(chaine, len(identifiants))
+
+    tableaux = {
+        'entites': np.array([interner(str(e)) for e in entites], dtype=np.int64),
+        'nb_lignes': np.array([profils[e].nb_lignes for e in entites], dtype=np.int64),
+    }
+    for attribut in ATTRIBUTS:
+        lignes = [sorted(interner(str(v)) for v in getattr(profils[e], attribut)) for e in entites]
+        decalages = np.zeros(len(entites) + 1, dtype=np.int64)
+        np.cumsum([len(l) for l in lignes], out=decalages[1:])
+        tableaux[f"{attribut}_decalages"] = decalages
+        tableaux[f"{attribut}_jetons"] = np.fromiter((j for l in lignes for j in l), dtype=np.int64,
+                                                     count=int(decalages[-1]))
+    for colonne in COLONNES_PREMIERE_LIGNE:
+        valeurs = [profils[e].premiere_ligne.get(colonne) for e in entites]
+        tableaux[f"premiere_ligne_{colonne}"] = np.array(
+            [interner(str(v)) if pd.notna(v) else -1 for v in valeurs], dtype=np.int64)
+    tableaux['chaines_decalages'], tableaux['chaines_octets'] = _table_chaines(list(identifiants))
+
+    # Index CSR en int32 tant qu'ils tiennent : scipy les reprend alors sans copie
+    nnz_max = max(int(tableaux[f"{a}_decalages"][-1]) for a in ATTRIBUTS)
+    type_index = np.int32 if max(nnz_max, len(identifiants)) < 2 ** 31 else np.int64
+    for attribut in ATTRIBUTS:
+        for suffixe in ('decalages', 'jetons'):
+            tableaux[f"{attribut}_{suffixe}"] = tableaux[f"{attribut}_{suffixe}"].astype(type_index)
+    tableaux['uns'] = np.ones(nnz_max, dtype=np.int32)
+
+    os.makedirs(dossier, exist_ok=True)
+    version = f"v{time.time_ns()}_{os.getpid()}"
+    chemin = os.path.join(dossier, version)
+    os.makedirs(chemin)
+    for nom, tableau in tableaux.items():
+        np.save(os.path.join(chemin, nom + ".npy"), tableau)
+    meta = {'version': VERSION_MAGASIN, 'entites': len(entites), 'chaines': len(identifiants),
+            'empreinte': empreinte, 'tableaux': sorted(tableaux)}
+    with open(os.path.join(chemin, FICHIER_META), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    # Fichier temporaire propre à la version : deux écritures concurrentes ne se le disputent pas
+    pointeur = os.path.join(dossier, FICHIER_VERSION)
+    temporaire = f"{pointeur}.{version}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(temporaire, pointeur)
+    _nettoyer_versions(dossier, version)
+    return dossier
+
+
+# Le magasin existe-t-il pour ces données (même empreinte, même format) ?
+def magasin_a_jour(dossier, empreinte):
+    try:
+        with open(os.path.join(version_actuelle(dossier), FICHIER_META), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get('version') == VERSION_MAGASIN and meta.get('empreinte') == empreinte
+
+
+# Magasin de profils ouvert en lecture seule : les tableaux sont projetés en mémoire
+# (np.load avec mmap_mode), l'ouverture ne lit que les en-têtes et tous les processus
+# qui l'ouvrent partagent les mêmes pages du cache système. Le magasin reste sur la
+# version publiée à l'ouverture, même si une nouvelle version est écrite ensuite.
+class MagasinProfils:
+    def __init__(self, dossier):
+        chemin = version_actuelle(dossier)
+        with open(os.path.join(chemin, FICHIER_META), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['version'] != VERSION_MAGASIN:
+            raise ValueError(f"{dossier} : format de magasin {meta['version']}, attendu {VERSION_MAGASIN}")
+        self.dossier = dossier
+        self.empreinte = meta['empreinte']
+        self.nb_chaines = meta['chaines']
+        self._tableaux = {nom: np.load(os.path.join(chemin, nom + ".npy"), mmap_mode='r')
+                          for nom in meta['tableaux']}
+        self._entites = None
+
+    def __len__(self):
+        return len(self._tableaux['entites'])
+
+    def chaine(self, identifiant):
+        decalages = self._tableaux['chaines_decalages']
+        return bytes(self._tableaux['chaines_octets'][decalages[identifiant]:decalages[identifiant + 1]]).decode('utf-8')
+
+    # Noms des entités, dans l'ordre du magasin (décodés au premier appel)
+    @property
+    def entites(self):
+        if self._entites is None:
+            self._entites = [self.chaine(i) for i in self._tableaux['entites']]
+        return self._entites
+
+    # Matrice binaire CSR d'un attribut pour les n premières entités (colonnes =
+    # identifiants de la table de chaînes), construite sur les tableaux projetés sans copie
+    def matrice(self, attribut, n=None):
+        n = len(self) if n is None else min(n, len(self))
+        decalages = self._tableaux[f"{attribut}_decalages"][:n + 1]
+        nnz = int(decalages[-1])
+        return sp.csr_matrix((self._tableaux['uns'][:nnz], self._tableaux[f"{attribut}_jetons"][:nnz], decalages),
+                             shape=(n, self.nb_chaines), copy=False)
+
+    # Équivalent de similarite.encoder_profils sur les n premières entités
+    def encoder(self, attributs, n=None):
+        matrices, tailles = {}, {}
+        for attribut in attributs:
+            matrices[attribut] = self.matrice(attribut, n)
+            tailles[attribut] = np.diff(matrices[attribut].indptr)
+        return matrices, tailles
+
+    # Profil reconstruit d'une entité (par sa position dans le magasin)
+    def profil(self, i):
+        ensembles = {}
+        for attribut in ATTRIBUTS:
+            decalages = self._tableaux[f"{attribut}_decalages"]
+            valeurs = {self.chaine(j) for j in self._tableaux[f"{attribut}_jetons"][decalages[i]:decalages[i + 1]]}
+            ensembles[attribut] = {int(v) for v in valeurs} if attribut == 'annees' else valeurs
+        premiere_ligne = {}
+        for colonne in COLONNES_PREMIERE_LIGNE:
+            j = self._tableaux[f"premiere_ligne_{colonne}"][i]
+            premiere_ligne[colonne] = self.chaine(j) if j >= 0 else np.nan
+        return Profil(nb_lignes=int(self._tableaux['nb_lignes'][i]), premiere_ligne=premiere_ligne, **ensembles)
+
+    # Profils des n premières entités (nom -> Profil), comme construire_profils
+    def profils(self, n=None):
+        n = len(self) if n is None else min(n, len(self))
+        return {self.entites[i]: self.profil(i) for i in range(n)}
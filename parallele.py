@@ -0,0 +1,108 @@
+import multiprocessing as mp
+import os
+import numpy as np
+import scipy.sparse as sp
+from tqdm import tqdm
+from instrumentation import compter
+from magasin_profils import MagasinProfils
+from similarite import encoder_profils, scores_bloc
+
+# État partagé des processus : profils encodés, transmis une seule fois par processus
+# (hérités sans copie avec fork)
+_ETAT = {}
+
+
+def _initialiser(matrices, tailles, poids, seuil, mesure):
+    _ETAT.update(matrices=matrices, tailles=tailles, poids=poids, seuil=seuil, mesure=mesure)
+
+
+# Variante où chaque processus ne reçoit que le chemin d'un magasin de profils et s'y
+# attache : les matrices sont des vues sur les fichiers projetés en mémoire
+def _initialiser_magasin(dossier, n, poids, seuil, mesure):
+    matrices, tailles = MagasinProfils(dossier).encoder(poids, n)
+    _initialiser(matrices, tailles, poids, seuil, mesure)
+
+
+# Arêtes (i < j) d'un bloc de lignes, renvoyées sous forme de tableaux compacts
+def _aretes_bloc(bloc):
+    debut, fin = bloc
+    scores = scores_bloc(_ETAT['matrices'], _ETAT['tailles'], _ETAT['poids'], debut, fin, _ETAT['mesure'])
+    scores = sp.triu(scores, k=1).tocoo()
+    garder = scores.data >= _ETAT['seuil']
+    return (
+        debut,
+        (debut + scores.row[garder]).astype(np.int32),
+        (debut + scores.col[garder]).astype(np.int32),
+        scores.data[garder],
+    )
+
+
+# Découper le triangle supérieur (n lignes) en blocs de lignes contenant
+# à peu près le même nombre de paires
+def blocs_equilibres(n, nb_blocs):
+    paires_par_ligne = np.arange(n - 1, -1, -1)
+    cumul = np.concatenate([[0], np.cumsum(paires_par_ligne)])
+    cibles = np.linspace(0, cumul[-1], nb_blocs + 1)
+    bornes = np.unique(np.searchsorted(cumul, cibles, side='left'))
+    bornes[0], bornes[-1] = 0, n
+    bornes = np.unique(bornes)
+    return [(int(a), int(b)) for a, b in zip(bornes[:-1], bornes[1:]) if b > a]
+
+
+# Construction parallèle de la liste d'arêtes (même résultat que aretes_similarite,
+# quel que soit le nombre de processus)
+def aretes_paralleles(profils, entites, poids, seuil, mesure='jaccard', nb_processus=None, blocs_par_processus=4, progression=False):
+    nb_processus = nb_processus or os.cpu_count()
+    # Sans fork (Windows), les processus rechargeraient le script : on reste séquentiel
+    if 'fork' not in mp.get_all_start_methods():
+        nb_processus = 1
+
+    matrices, tailles = encoder_profils(profils, entites, poids)
+    return _aretes_blocs(len(entites), _initialiser, (matrices, tailles, poids, seuil, mesure), nb_processus,
+                         blocs_par_processus, progression)
+
+
+# Construction parallèle à partir d'un magasin de profils (magasin_profils.py), sur ses
+# n premières entités : les processus s'y attachent sans copier les profils
+def aretes_paralleles_magasin(dossier, poids, seuil, mesure='jaccard', n=None, nb_processus=None,
+                              blocs_par_processus=4, progression=False):
+    nb_processus = nb_processus or os.cpu_count()
+    if 'fork' not in mp.get_all_start_methods():
+        nb_processus = 1
+    n = len(MagasinProfils(dossier)) if n is None else min(n, len(MagasinProfils(dossier)))
+    return _aretes_blocs(n, _initialiser_magasin, (dossier, n, poids, seuil, mesure), nb_processus,
+                         blocs_par_processus, progression)
+
+
+# Calcul des blocs de lignes, dans des processus préparés par `initialiseur(*etat)`
+def _aretes_blocs(n, initialiseur, etat, nb_processus, blocs_par_processus, progression):
+    blocs = blocs_equilibres(n, nb_processus * blocs_par_processus)
+
+    # Nombre de paires de chaque bloc, pour faire avancer une barre de progression unique
+    paires = {debut: sum(n - 1 - i for i in range(debut, fin)) for debut, fin in blocs}
+
+    resultats = {}
+    with tqdm(total=n * (n - 1) // 2, disable=not progression) as barre:
+        if nb_processus == 1:
+            initialiseur(*etat)
+            for debut, *aretes in map(_aretes_bloc, blocs):
+                resultats[debut] = aretes
+                barre.update(paires[debut])
+        else:
+            contexte = mp.get_context('fork')
+            with contexte.Pool(nb_processus, initializer=initialiseur, initargs=etat) as pool:
+                for debut, *aretes in pool.imap_unordered(_aretes_bloc, blocs):
+                    resultats[debut] = aretes
+                    barre.update(paires[debut])
+
+    # Assemblage dans l'ordre des blocs puis de la double boucle : résultat déterministe
+    morceaux = [resultats[debut] for debut in sorted(resultats)]
+    compter('paires_possibles', n * (n - 1) // 2)
+    compter('aretes', sum(len(m[0]) for m in morceaux))
+    if not morceaux:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0)
+    sources = np.concatenate([m[0] for m in morceaux])
+    cibles = np.concatenate([m[1] for m in morceaux])
+    scores = np.concatenate([m[2] for m in morceaux])
+    ordre = np.lexsort((cibles, sources))
+    return sources[ordre], cibles[ordre], scores[ordre]
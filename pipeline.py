@@ -0,0 +1,498 @@
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from chargement import FICHIER_DONNEES, charger_donnees, empreinte_fichier
+from flux import entites_frequentes_profils, profils_en_flux
+from profils import (ATTRIBUTS, COLONNES_PROFIL, Profil, construire_profils, entites_frequentes, pays_principal,
+                     valeurs_liste)
+from similarite import POIDS_TEXTE_GEO, POIDS_QUATRE_VARIABLES, aretes_knn, aretes_similarite
+from index_inverse import aretes_index
+from parallele import aretes_paralleles
+from magasin_profils import ecrire_magasin, magasin_a_jour
+from cache_scores import PLANCHER, aretes_en_cache
+from graphe import GrapheCompact
+from instrumentation import RapportExecution, compter, etape
+from disposition import METHODES, disposition, charger_positions, sauver_positions
+from communautes import METHODES as METHODES_COMMUNAUTES
+from communautes import adjacence, balayage_resolutions, choisir_resolution, detecter_communautes, modularite
+from analyses import ECHANTILLON_INTERMEDIARITE, exporter_analyses
+
+# Types d'entités : nom -> colonne du jeu de données
+ENTITES = {'outlet': 'outlet', 'keyword': 'keywords', 'country': 'normalized_country'}
+# Nom des entités au pluriel, pour les affichages
+PLURIELS = {'outlet': 'outlets', 'keyword': 'mots-clés', 'country': 'pays'}
+
+# Pondérations prédéfinies
+PONDERATIONS = {'texte_geo': POIDS_TEXTE_GEO, 'quatre_variables': POIDS_QUATRE_VARIABLES}
+
+
+# Ensembles comparés entre entités : 'profil' (valeurs de toutes les lignes de l'entité),
+# 'premiere_ligne' (valeurs de sa première ligne, découpées sur les virgules) ou
+# 'premiere_ligne_brute' (valeur entière de sa première ligne, comparée telle quelle)
+ENSEMBLES = ('profil', 'premiere_ligne', 'premiere_ligne_brute')
+MESURES = ('jaccard', 'intersection', 'presence')
+
+# Moteurs exacts de calcul des arêtes (mêmes arêtes, seul le temps de calcul change)
+MOTEURS = ('blocs', 'index', 'parallele', 'cache')
+
+# Colonne brute de chaque attribut dans la première ligne d'un profil
+COLONNES_ATTRIBUTS = {'mots_cles': 'keywords', 'pays': 'country', 'langues': 'target_language'}
+
+
+# Paramètres d'un graphe : type d'entité, sélection, ensembles comparés, pondération,
+# seuil (ou k plus proches voisins), détection de communautés et moteur de calcul des arêtes
+@dataclass
+class Configuration:
+    nom: str = 'outlets'
+    entite: str = 'outlet'
+    top: int = 3000
+    poids: dict = field(default_factory=lambda: dict(POIDS_TEXTE_GEO))
+    seuil: float = 0.25
+    mesure: str = 'jaccard'
+    ensembles: str = 'profil'
+    knn: int = None
+    mutuel: bool = False
+    composante: bool = True
+    resolution: float = 0.9
+    graine: int = 42
+    communautes: str = 'csr'
+    moteur: str = 'blocs'
+
+
+# Variantes reprenant les anciens scripts (seuil 0 : toutes les paires de score non nul)
+VARIANTES = {c.nom: c for c in [
+    # main.py : mots-clés reliés par pays et langue cible identiques (première occurrence)
+    Configuration('mots_cles', 'keyword', 50, {'pays': 1, 'langues': 1}, 0, 'presence', 'premiere_ligne_brute',
+                  composante=False, resolution=1.0),
+    # non_connexes.py : idem avec au moins un pays / une langue en commun, composant principal
+    Configuration('mots_cles_connexes', 'keyword', 50, {'pays': 1, 'langues': 1}, 0, 'presence', 'premiere_ligne',
+                  resolution=1.0),
+    # Toutes_variables.py : Jaccard pondéré sur les quatre attributs (index inversé)
+    Configuration('outlets_quatre_variables', 'outlet', 600, dict(POIDS_QUATRE_VARIABLES), 0.2, resolution=1.0,
+                  moteur='index'),
+    # S_outlet_4variables.py : nombres d'éléments communs pondérés (cache des scores)
+    Configuration('outlets_elements_communs', 'outlet', 50, {'langues': 4, 'mots_cles': 2, 'pays': 3, 'annees': 1},
+                  0, 'intersection', resolution=1.0, moteur='cache'),
+    # S_outlet_A_70t30k.py : 7 points pour une langue commune, 3 pour un mot-clé commun (index inversé)
+    Configuration('outlets_premiere_ligne', 'outlet', 100, {'langues': 7, 'mots_cles': 3}, 0, 'presence',
+                  'premiere_ligne', resolution=1.0, moteur='index'),
+    # Toutes_données_N.py : Jaccard 0.6 mots-clés / 0.4 pays
+    Configuration('outlets', 'outlet', 3000, dict(POIDS_TEXTE_GEO), 0.25),
+    # pays_cibles.py : langues cibles (x3) et mots-clés (x2) communs entre pays
+    Configuration('pays_cibles', 'country', 100, {'langues': 3, 'mots_cles': 2}, 0, 'intersection', resolution=1.0),
+]}
+
+
+# Pondération donnée en ligne de commande : nom prédéfini ou "attribut=poids,..."
+def lire_poids(texte):
+    if texte in PONDERATIONS:
+        return dict(PONDERATIONS[texte])
+    poids = {}
+    for element in texte.split(','):
+        attribut, _, valeur = element.partition('=')
+        if attribut.strip() not in ATTRIBUTS or not valeur:
+            raise argparse.ArgumentTypeError(f"pondération invalide : {texte!r} (attributs : {', '.join(ATTRIBUTS)})")
+        poids[attribut.strip()] = float(valeur)
+    return poids
+
+
+# Charger les colonnes utiles pour un type d'entité
+def charger_entites(entite, chemin):
+    colonne = ENTITES[entite]
+    sources = COLONNES_PROFIL + (['outlet'] if entite == 'outlet' else [])
+    df = charger_donnees(chemin, colonnes=sources)
+    if colonne == 'normalized_country':
+        df['normalized_country'] = pays_principal(df['country'])
+    return df
+
+
+# Profils réduits aux valeurs de la première ligne de chaque entité (découpées sur les
+# virgules, ou valeur brute entière : une valeur manquante donne un ensemble vide)
+def profils_premiere_ligne(profils, entites, attributs, brute=False):
+    resultat = {}
+    for entite in entites:
+        profil = profils[entite]
+        ensembles = {}
+        for attribut in attributs:
+            if attribut not in COLONNES_ATTRIBUTS:
+                raise ValueError(f"l'attribut {attribut!r} n'existe pas dans la première ligne")
+            valeur = profil.premiere_ligne[COLONNES_ATTRIBUTS[attribut]]
+            if brute:
+                ensembles[attribut] = {valeur} if pd.notna(valeur) else set()
+            else:
+                ensembles[attribut] = set(valeurs_liste(valeur))
+        resultat[entite] = Profil(nb_lignes=profil.nb_lignes, premiere_ligne=profil.premiere_ligne, **ensembles)
+    return resultat
+
+
+# Graphe de similarité entre des entités dont les profils sont déjà construits : toutes
+# les paires au-dessus du seuil, ou les `knn` plus proches voisins de chaque entité
+# (le seuil n'est alors qu'un plancher)
+def graphe_profils(profils, entites, poids, seuil, mesure='jaccard', knn=None, mutuel=False, moteur='blocs',
+                   empreinte=None):
+    G = GrapheCompact(entites)
+    if knn:
+        aretes = aretes_knn(profils, entites, poids, knn, mutuel, seuil, mesure)
+    elif moteur == 'index':
+        aretes = aretes_index(profils, entites, poids, seuil, mesure)
+    elif moteur == 'parallele':
+        aretes = aretes_paralleles(profils, entites, poids, seuil, mesure)
+    elif moteur == 'cache':
+        # Les mesures de comptage valent au moins 1 dès qu'une valeur est partagée : sans
+        # plancher, le cache reste exact même au seuil 0
+        plancher = PLANCHER if mesure == 'jaccard' else 0
+        aretes = aretes_en_cache(profils, entites, poids, seuil, empreinte, mesure, plancher)
+    else:
+        aretes = aretes_similarite(profils, entites, poids, seuil, mesure)
+    G.ajouter_aretes(*aretes)
+    return G
+
+
+# Empreinte du contenu d'une étape : son nom, ses paramètres et les empreintes de ses entrées
+def empreinte_etape(nom, parametres):
+    contenu = json.dumps([nom, parametres], sort_keys=True, default=str)
+    return hashlib.sha1(contenu.encode('utf-8')).hexdigest()
+
+
+# Résultats d'étapes gardés en mémoire pendant une exécution, indexés par l'empreinte de
+# leur contenu : deux configurations qui partagent le chargement, les profils ou le
+# graphe ne les calculent qu'une fois
+class MemoireEtapes:
+    def __init__(self):
+        self._resultats = {}
+
+    def __contains__(self, cle):
+        return cle in self._resultats
+
+    def calculer(self, nom, parametres, fonction):
+        cle = empreinte_etape(nom, parametres)
+        if cle in self._resultats:
+            compter('etapes_memoisees')
+        else:
+            with etape(nom):
+                self._resultats[cle] = fonction()
+        return cle, self._resultats[cle]
+
+
+# Pipeline à étapes mémoïsées sur un fichier de données :
+# chargement -> profils -> similarite -> composantes -> communautes.
+# Les paramètres d'une étape incluent ceux des étapes dont elle dépend : son empreinte
+# identifie tout ce qui a servi à la calculer, et les étapes amont ne sont appelées
+# que si le résultat n'est pas déjà en mémoire. Chaque étape renvoie (empreinte, résultat).
+# `moteur` impose un moteur d'arêtes à toutes les configurations (None : celui de chacune) ;
+# les moteurs étant exacts, il ne fait pas partie de l'empreinte du graphe.
+class Pipeline:
+    def __init__(self, chemin=FICHIER_DONNEES, flux=None, moteur=None, memoire=None):
+        self.chemin = chemin
+        self.flux = flux
+        self.moteur = moteur
+        self.memoire = memoire or MemoireEtapes()
+        self._tops = {}
+        self._empreinte = None
+
+    # Annoncer les configurations à exécuter : les profils d'un type d'entité sont alors
+    # construits une seule fois, pour la plus grande sélection demandée
+    def preparer(self, configurations):
+        for config in configurations:
+            self._tops[config.entite] = max(self._tops.get(config.entite, 0), config.top)
+
+    def empreinte_donnees(self):
+        if self._empreinte is None:
+            self._empreinte = empreinte_fichier(self.chemin)
+        return self._empreinte
+
+    def parametres_profils(self, entite, top):
+        return {'donnees': self.empreinte_donnees(), 'colonne': ENTITES[entite],
+                'top': max(top, self._tops.get(entite, 0))}
+
+    def parametres_graphe(self, config):
+        return {'profils': self.parametres_profils(config.entite, config.top), 'top': config.top,
+                'ensembles': config.ensembles, 'poids': config.poids, 'mesure': config.mesure,
+                'seuil': config.seuil, 'knn': config.knn, 'mutuel': config.mutuel}
+
+    def parametres_composantes(self, config):
+        return {'graphe': self.parametres_graphe(config), 'composante': config.composante}
+
+    def parametres_communautes(self, config, resolutions=None):
+        return {'composantes': self.parametres_composantes(config), 'resolution': config.resolution,
+                'graine': config.graine, 'methode': config.communautes, 'balayage': resolutions,
+                'choix': 'stabilite, modularite_standard' if resolutions else None}
+
+    # Toutes les colonnes utiles aux trois types d'entités, chargées une fois
+    def donnees(self):
+        colonnes = ['outlet'] + COLONNES_PROFIL
+
+        def charger():
+            df = charger_donnees(self.chemin, colonnes=colonnes)
+            df['normalized_country'] = pays_principal(df['country'])
+            return df
+        return self.memoire.calculer('chargement', {'donnees': self.empreinte_donnees(), 'colonnes': colonnes},
+                                     charger)
+
+    # Les `top` entités les plus fréquentes et leurs profils
+    def profils(self, entite, top):
+        colonne = ENTITES[entite]
+        parametres = self.parametres_profils(entite, top)
+
+        def construire():
+            if self.flux:
+                profils = profils_en_flux(self.chemin, colonne, self.flux)
+                entites = entites_frequentes_profils(profils, parametres['top'])
+                return entites, {e: profils[e] for e in entites}
+            _, df = self.donnees()
+            entites = entites_frequentes(df[colonne], parametres['top'])
+            return entites, construire_profils(df, colonne, entites)
+        cle, (entites, profils) = self.memoire.calculer('profils', parametres, construire)
+        return cle, (entites[:top], profils)
+
+    # Entités d'une configuration et ensembles qu'elle compare (profils complets ou
+    # réduits à la première ligne)
+    def profils_compares(self, config):
+        cle_profils, (entites, profils) = self.profils(config.entite, config.top)
+        if config.ensembles != 'profil':
+            profils = profils_premiere_ligne(profils, entites, config.poids,
+                                             brute=config.ensembles == 'premiere_ligne_brute')
+        return cle_profils, entites, profils
+
+    # Graphe de similarité (GrapheCompact) d'une configuration
+    def graphe(self, config):
+        def construire():
+            cle_profils, entites, profils = self.profils_compares(config)
+            # Le cache des scores est indexé par les entités : les ensembles comparés
+            # s'ajoutent à l'empreinte des données
+            return graphe_profils(profils, entites, config.poids, config.seuil, config.mesure, config.knn,
+                                  config.mutuel, self.moteur or config.moteur, f"{cle_profils}:{config.ensembles}")
+        return self.memoire.calculer('similarite', self.parametres_graphe(config), construire)
+
+    # Graphe networkx réduit au plus grand composant connexe (ou complet)
+    def composantes(self, config):
+        def extraire():
+            _, G = self.graphe(config)
+            return G.composante_principale().vers_networkx() if config.composante else G.vers_networkx()
+        return self.memoire.calculer('composantes', self.parametres_composantes(config), extraire)
+
+    # Partition en communautés ; avec `resolutions`, balayage de résolutions et partition
+    # la plus stable entre graines (puis de meilleure modularité standard, voir choisir_resolution)
+    def communautes(self, config, resolutions=None):
+        def detecter():
+            _, G = self.composantes(config)
+            if not resolutions:
+                return detecter_communautes(G, config.resolution, config.graine, config.communautes)
+            rapport = balayage_resolutions(G, resolutions, methode=config.communautes)
+            for r in rapport:
+                print(f"résolution {r['resolution']:.2f} : modularité {r['modularite_moyenne']:.4f} "
+                      f"(standard {r['modularite_standard']:.4f}), {r['communautes']} communautés, "
+                      f"stabilité {r['stabilite']:.3f}")
+            return choisir_resolution(rapport)['partition']
+        return self.memoire.calculer('communautes', self.parametres_communautes(config, resolutions), detecter)
+
+
+# Résumé de chaque communauté : taille, arêtes internes, membres de plus fort degré
+def resumer_communautes(G, partition, nb_membres=10):
+    degres = dict(G.degree())
+    membres = {}
+    for noeud, comm in partition.items():
+        membres.setdefault(comm, []).append(noeud)
+
+    resumes = []
+    for comm, noeuds in sorted(membres.items()):
+        sous_graphe = G.subgraph(noeuds)
+        principaux = sorted(noeuds, key=lambda n: degres[n], reverse=True)[:nb_membres]
+        resumes.append({
+            'communaute': comm,
+            'taille': len(noeuds),
+            'aretes_internes': sous_graphe.number_of_edges(),
+            'poids_interne': sous_graphe.size(weight='weight'),
+            'principaux': [str(n) for n in principaux],
+        })
+    return resumes
+
+
+# Afficher les membres puis la taille de chaque communauté (sortie de pays_cibles.py)
+def lister_communautes(partition, entite):
+    membres = {}
+    for noeud, comm in partition.items():
+        membres.setdefault(comm, []).append(noeud)
+    print("Communautés détectées :")
+    for comm, noeuds in sorted(membres.items()):
+        print(f"Communauté {comm}: {noeuds}")
+    print("\nTaille des communautés :")
+    for comm, noeuds in sorted(membres.items()):
+        print(f"Communauté {comm}: {len(noeuds)} {PLURIELS[entite]}")
+
+
+# Modularité (résolution 1) d'une partition nœud -> communauté
+def _modularite(G, partition):
+    if not G.number_of_edges():
+        return 0.0
+    A, noeuds = adjacence(G)
+    etiquettes = np.unique([partition[n] for n in noeuds], return_inverse=True)[1]
+    return modularite(A, etiquettes)
+
+
+# Écrire le graphe (GraphML), la partition (Parquet) et le résumé des communautés (JSON)
+def exporter_resultats(G, partition, dossier, parametres=None):
+    os.makedirs(dossier, exist_ok=True)
+
+    G = G.copy()
+    nx.set_node_attributes(G, partition, 'communaute')
+    nx.write_graphml(G, os.path.join(dossier, 'graphe.graphml'))
+    # Matrice d'adjacence dans l'ordre des lignes de la table de partition (rechargée sans
+    # analyse XML par serveur.py)
+    A, _ = adjacence(G, list(partition))
+    sp.save_npz(os.path.join(dossier, 'adjacence.npz'), sp.csr_matrix(A))
+
+    degres = dict(G.degree())
+    table = pd.DataFrame({
+        'entite': [str(n) for n in partition],
+        'communaute': list(partition.values()),
+        'degre': [degres[n] for n in partition],
+    })
+    try:
+        table.to_parquet(os.path.join(dossier, 'partition.parquet'), index=False)
+    except ImportError:
+        table.to_csv(os.path.join(dossier, 'partition.csv'), index=False)
+
+    resume = {
+        'parametres': parametres or {},
+        'noeuds': G.number_of_nodes(),
+        'aretes': G.number_of_edges(),
+        'modularite': _modularite(G, partition),
+        'communautes': resumer_communautes(G, partition),
+    }
+    with open(os.path.join(dossier, 'communautes.json'), 'w', encoding='utf-8') as f:
+        json.dump(resume, f, ensure_ascii=False, indent=2)
+    return resume
+
+
+def analyser_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Graphe de similarité euvsdisinfo et communautés")
+    parser.add_argument('--donnees', default=FICHIER_DONNEES)
+    parser.add_argument('--variantes', nargs='+', choices=sorted(VARIANTES), default=None, metavar='VARIANTE',
+                        help=f"configurations prédéfinies exécutées ensemble, chacune dans --sortie/<variante> "
+                             f"({', '.join(VARIANTES)}) ; sinon une configuration décrite par les options suivantes")
+    parser.add_argument('--entite', choices=sorted(ENTITES), default='outlet')
+    parser.add_argument('--top', type=int, default=3000)
+    parser.add_argument('--seuil', type=float, default=0.25)
+    parser.add_argument('--poids', type=lire_poids, default='texte_geo',
+                        help=f"{' ou '.join(sorted(PONDERATIONS))}, ou \"attribut=poids,...\" "
+                             f"(attributs : {', '.join(ATTRIBUTS)})")
+    parser.add_argument('--mesure', choices=MESURES, default='jaccard')
+    parser.add_argument('--ensembles', choices=ENSEMBLES, default='profil',
+                        help="valeurs comparées : toutes les lignes de l'entité ou seulement la première")
+    parser.add_argument('--knn', type=int, default=None, metavar='K',
+                        help="graphe des K plus proches voisins au lieu du graphe à seuil")
+    parser.add_argument('--mutuel', action='store_true',
+                        help="avec --knn, ne garder que les voisins mutuels")
+    parser.add_argument('--graphe-complet', action='store_true',
+                        help="garder tout le graphe au lieu du plus grand composant connexe")
+    parser.add_argument('--resolution', type=float, default=0.9)
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--communautes', choices=METHODES_COMMUNAUTES, default='csr',
+                        help="csr : Louvain vectorisé ; leiden : nécessite igraph et leidenalg")
+    parser.add_argument('--balayage', type=float, nargs='+', default=None, metavar='RESOLUTION',
+                        help="résolutions à comparer (modularité, stabilité entre graines)")
+    parser.add_argument('--flux', type=int, default=None, metavar='LIGNES',
+                        help="lire le fichier en flux par morceaux de LIGNES lignes (fichiers plus grands que la mémoire)")
+    parser.add_argument('--moteur', choices=MOTEURS, default=None,
+                        help="calcul des arêtes : blocs de matrices creuses, index inversé, processus parallèles "
+                             "ou cache disque des scores par attribut (par défaut celui de chaque variante, "
+                             "blocs sinon)")
+    parser.add_argument('--echantillon-intermediarite', type=int, default=ECHANTILLON_INTERMEDIARITE, metavar='K',
+                        help="sources tirées pour l'intermédiarité approchée (0 : calcul exact)")
+    parser.add_argument('--sortie', default='resultats')
+    parser.add_argument('--max-labels', type=int, default=5)
+    parser.add_argument('--layout', choices=METHODES, default='barnes_hut')
+    parser.add_argument('--rendu', choices=['vectoriel', 'raster'], default='vectoriel',
+                        help="raster : image accumulée avec numpy, pour les graphes denses")
+    parser.add_argument('--positions', default=None,
+                        help="fichier JSON de positions pour repartir du rendu précédent")
+    parser.add_argument('--magasin', action='store_true',
+                        help="écrire aussi le magasin des profils comparés (<sortie>/magasin), "
+                             "utilisé par serveur.py pour les requêtes de similarité")
+    parser.add_argument('--lister-communautes', action='store_true',
+                        help="afficher les membres et la taille de chaque communauté")
+    parser.add_argument('--no-render', action='store_true',
+                        help="mode batch : pas de matplotlib, uniquement les fichiers exportés")
+    parser.add_argument('--afficher', action='store_true',
+                        help="afficher les figures à la fin de l'exécution")
+    parser.add_argument('--profiler', nargs='+', default=(), metavar='ETAPE',
+                        help="étapes à passer sous cProfile (fichiers profil_<etape>.prof dans --sortie)")
+    parser.add_argument('--tracer', nargs='+', default=(), metavar='ETAPE',
+                        help="étapes à passer sous tracemalloc (pic et principaux sites d'allocation)")
+    return parser.parse_args(argv)
+
+
+# Configurations demandées : les variantes nommées, sinon celle des options
+def configurations(args):
+    if args.variantes:
+        return [VARIANTES[nom] for nom in dict.fromkeys(args.variantes)]
+    return [Configuration('pipeline', args.entite, args.top, args.poids, args.seuil, args.mesure, args.ensembles,
+                          args.knn, args.mutuel, not args.graphe_complet, args.resolution, args.graine,
+                          args.communautes, args.moteur or 'blocs')]
+
+
+# Exécuter une configuration puis exporter (et dessiner) ses résultats dans `dossier`
+def executer(pipeline, config, dossier, args):
+    with etape(config.nom):
+        _, partition = pipeline.communautes(config, args.balayage)
+        _, G = pipeline.composantes(config)
+
+        with etape('export'):
+            resume = exporter_resultats(G, partition, dossier, parametres=asdict(config))
+        with etape('analyses'):
+            metriques, _ = exporter_analyses(G, partition, dossier, args.echantillon_intermediarite or None,
+                                             config.graine)
+        if args.magasin:
+            with etape('magasin'):
+                cle_profils, entites, profils = pipeline.profils_compares(config)
+                empreinte = empreinte_etape('magasin', [cle_profils, config.top, config.ensembles])
+                chemin_magasin = os.path.join(dossier, 'magasin')
+                if not magasin_a_jour(chemin_magasin, empreinte):
+                    ecrire_magasin(profils, entites, chemin_magasin, empreinte)
+        print(f"{config.nom} : {resume['noeuds']} nœuds, {resume['aretes']} arêtes, "
+              f"{len(resume['communautes'])} communautés (modularité {resume['modularite']:.3f})")
+        if args.lister_communautes:
+            lister_communautes(partition, config.entite)
+
+        if not args.no_render:
+            from rendu import dessiner_reseau, dessiner_reseau_raster
+            dessin = dessiner_reseau_raster if args.rendu == 'raster' else dessiner_reseau
+            with etape('disposition'):
+                pos = disposition(G, args.layout, graine=config.graine,
+                                  pos_initiales=charger_positions(args.positions))
+                if args.positions:
+                    sauver_positions(pos, args.positions)
+            with etape('rendu'):
+                dessin(G, partition, config.seuil, args.max_labels,
+                       fichier=os.path.join(dossier, 'network_final.png'), pos=pos, afficher=False,
+                       degres=dict(zip(G.nodes(), metriques['degre'])), entites=PLURIELS[config.entite])
+    return resume
+
+
+def main(argv=None):
+    args = analyser_arguments(argv)
+    execution = RapportExecution('pipeline', vars(args), args.sortie, args.profiler, args.tracer)
+    configs = configurations(args)
+    pipeline = Pipeline(args.donnees, args.flux, args.moteur)
+    pipeline.preparer(configs)
+
+    with execution:
+        for config in configs:
+            dossier = os.path.join(args.sortie, config.nom) if args.variantes else args.sortie
+            executer(pipeline, config, dossier, args)
+
+    execution.ecrire(os.path.join(args.sortie, 'rapport_execution.json'))
+    if args.afficher and not args.no_render:
+        import matplotlib.pyplot as plt
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field, replace
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from cache_scores import calculer_composantes, melanger
+from chargement import FICHIER_DONNEES
+from communautes import METHODES as METHODES_COMMUNAUTES
+from communautes import etiquettes_communautes, modularite
+from graphe import GrapheCompact
+from instrumentation import reinitialiser_pic_rss, pic_rss
+from magasin_profils import MagasinProfils, ecrire_magasin
+from pipeline import MESURES, VARIANTES, Pipeline, empreinte_etape, lire_poids, profils_premiere_ligne
+
+DOSSIER_GRILLE = "grille"
+FICHIER_COMPARAISON = "comparaison.csv"
+
+# Mémoire fixe comptée pour chaque tâche (interpréteur et bibliothèques d'un processus), en Mo
+MEMOIRE_BASE = 150
+TAILLE_BLOC = 2000
+
+
+# Tâche du graphe de dépendances : une étape, les arguments de sa fonction et les clés des
+# tâches dont les résultats lui sont passés (dans l'ordre). La clé est l'empreinte du
+# contenu : deux configurations qui demandent le même calcul partagent la même tâche.
+@dataclass
+class Tache:
+    cle: str
+    etape: str
+    arguments: dict
+    dependances: list = field(default_factory=list)
+    configurations: list = field(default_factory=list)
+
+
+# Configurations d'une grille : produit cartésien des valeurs de chaque axe (champ de
+# Configuration : top, seuil, resolution...) appliqué à une configuration de base
+def grille(base, **axes):
+    noms = [nom for nom, valeurs in axes.items() if valeurs]
+    configurations = []
+    for valeurs in itertools.product(*(axes[nom] for nom in noms)):
+        changements = dict(zip(noms, valeurs))
+        nom = ",".join(f"{n}={v}" for n, v in changements.items()) or base.nom
+        configurations.append(replace(base, nom=nom, **changements))
+    return configurations
+
+
+# Plancher des scores par attribut qui garde exact le graphe au seuil donné : une paire de
+# score >= seuil a au moins une composante >= seuil / somme des poids
+def plancher_exact(seuil, poids):
+    total = sum(poids.values())
+    return 0.0 if seuil <= 0 or total <= 0 else 0.999 * seuil / total
+
+
+# Étapes exécutées par les processus (fonctions du module, pour être transmises par pickle)
+def _profils(chemin, flux, entite, top):
+    _, (entites, profils) = Pipeline(chemin, flux).profils(entite, top)
+    return entites, profils
+
+
+# Scores par attribut de toutes les paires au-dessus du plancher, indépendants des poids et
+# du seuil : toutes les configurations de même entité, ensembles et mesure les partagent
+def _scores(profils, ensembles, mesure, attributs, plancher):
+    entites, profils = profils
+    if ensembles != 'profil':
+        profils = profils_premiere_ligne(profils, entites, attributs, brute=ensembles == 'premiere_ligne_brute')
+    scores = calculer_composantes(profils, entites, mesure, plancher, TAILLE_BLOC, attributs)
+    scores['entites'] = entites
+    return scores
+
+
+# Graphe seuillé des `top` premières entités (paires i < j < top), réduit au plus grand
+# composant connexe : matrice d'adjacence CSR et noms des nœuds
+def _graphe(scores, top, poids, seuil, composante):
+    garder = scores['cibles'] < top
+    sous_ensemble = {a: scores[a][garder] for a in ['sources', 'cibles', *poids]}
+    G = GrapheCompact(scores['entites'][:top])
+    G.ajouter_aretes(*melanger(sous_ensemble, poids, seuil))
+    if composante:
+        G = G.composante_principale()
+    return {'noeuds': G.noeuds, 'A': G.csr(), 'aretes': G.number_of_edges()}
+
+
+# Partition (Louvain ou Leiden sur la matrice CSR) et sa modularité à la résolution 1,
+# comparable entre résolutions comme celle de l'export du pipeline
+def _partition(graphe, resolution, graine, methode):
+    A = graphe['A']
+    if not A.nnz:
+        return {'etiquettes': np.arange(A.shape[0]), 'modularite': 0.0}
+    etiquettes = etiquettes_communautes(A, resolution, graine, methode)
+    return {'etiquettes': etiquettes, 'modularite': modularite(A, etiquettes)}
+
+
+ETAPES = {'profils': _profils, 'scores': _scores, 'graphe': _graphe, 'partition': _partition}
+
+# Résumé gardé de chaque résultat (calculé par le processus qui l'a produit), après
+# libération des résultats intermédiaires
+RESUMES = {
+    'profils': lambda r: {'entites': len(r[0])},
+    'scores': lambda r: {'paires': len(r['sources'])},
+    'graphe': lambda r: {'noeuds': len(r['noeuds']), 'aretes': r['aretes']},
+    'partition': lambda r: {'communautes': len(np.unique(r['etiquettes'])), 'modularite': r['modularite']},
+}
+
+
+# Déposer un résultat dans le dossier `chemin` pour les processus qui en dépendent :
+# profils dans un magasin_profils, tableaux et matrices creuses en .npy, le reste en JSON
+def deposer(resultat, etape, chemin):
+    os.makedirs(chemin)
+    if etape == 'profils':
+        entites, profils = resultat
+        ecrire_magasin(profils, entites, os.path.join(chemin, 'magasin'))
+        return chemin
+    meta = {}
+    for nom, valeur in resultat.items():
+        if sp.issparse(valeur):
+            valeur = sp.csr_matrix(valeur)
+            for partie in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(chemin, f"{nom}.{partie}.npy"), getattr(valeur, partie))
+            meta[nom] = {'creuse': list(valeur.shape)}
+        elif isinstance(valeur, (np.ndarray, list)):
+            np.save(os.path.join(chemin, nom + ".npy"), np.asarray(valeur))
+            meta[nom] = {'liste': isinstance(valeur, list)}
+        else:
+            meta[nom] = {'valeur': valeur.item() if isinstance(valeur, np.generic) else valeur}
+    with open(os.path.join(chemin, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return chemin
+
+
+# Reprendre un résultat déposé : les tableaux sont projetés en mémoire (mmap), tous les
+# processus qui les lisent partagent les pages du cache système
+def reprendre(etape, chemin):
+    if etape == 'profils':
+        magasin = MagasinProfils(os.path.join(chemin, 'magasin'))
+        return magasin.entites, magasin.profils()
+    with open(os.path.join(chemin, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    resultat = {}
+    for nom, description in meta.items():
+        if 'creuse' in description:
+            parties = [np.load(os.path.join(chemin, f"{nom}.{p}.npy"), mmap_mode='r')
+                       for p in ('data', 'indices', 'indptr')]
+            resultat[nom] = sp.csr_matrix(tuple(parties), shape=tuple(description['creuse']))
+        elif 'liste' in description:
+            tableau = np.load(os.path.join(chemin, nom + ".npy"), mmap_mode='r')
+            resultat[nom] = tableau.tolist() if description['liste'] else tableau
+        else:
+            resultat[nom] = description['valeur']
+    return resultat
+
+
+# Exécution d'une tâche dans un processus : résultat, résumé, durée et pic de mémoire
+# résidente. Avec un dépôt, les entrées sont des références (étape, dossier) reprises
+# depuis le disque et le résultat y est déposé : seules ces références passent par pickle
+# entre le processus principal et les processus de calcul.
+def _executer_tache(cle, etape, arguments, entrees, depot=None):
+    reinitialiser_pic_rss()
+    debut = time.perf_counter()
+    if depot:
+        entrees = [reprendre(*entree) for entree in entrees]
+    resultat = ETAPES[etape](*entrees, **arguments)
+    resume = {**RESUMES[etape](resultat), 'taille_mo': taille_mo(resultat)}
+    if depot:
+        resultat = (etape, deposer(resultat, etape, os.path.join(depot, cle)))
+    return resultat, resume, time.perf_counter() - debut, pic_rss()
+
+
+# Graphe de dépendances d'une liste de configurations (à seuil) :
+# profils -> scores par attribut -> graphe seuillé -> partition.
+# Renvoie les tâches (dans un ordre topologique) et, pour chaque configuration,
+# les clés de sa chaîne de tâches.
+def construire_dag(configurations, chemin=FICHIER_DONNEES, flux=None):
+    pipeline = Pipeline(chemin, flux)
+    pipeline.preparer(configurations)
+    taches = {}
+
+    def ajouter(etape, parametres, arguments, dependances, config):
+        cle = empreinte_etape(etape, parametres)
+        tache = taches.setdefault(cle, Tache(cle, etape, arguments, list(dependances)))
+        tache.configurations.append(config.nom)
+        return cle
+
+    # Une tâche de scores par (profils, ensembles, mesure), avec les attributs de toutes
+    # les configurations qui en dépendent et le plus bas des planchers qu'elles exigent
+    groupes = {}
+    for config in configurations:
+        if config.knn:
+            raise ValueError(f"{config.nom} : le planificateur ne gère que les graphes à seuil (pas --knn)")
+        groupe = groupes.setdefault((config.entite, config.ensembles, config.mesure),
+                                    {'attributs': {}, 'plancher': np.inf})
+        groupe['attributs'].update(dict.fromkeys(config.poids))
+        groupe['plancher'] = min(groupe['plancher'], plancher_exact(config.seuil, config.poids))
+
+    chaines = {}
+    for config in configurations:
+        parametres_profils = pipeline.parametres_profils(config.entite, config.top)
+        cle_profils = ajouter('profils', parametres_profils,
+                              {'chemin': chemin, 'flux': flux, 'entite': config.entite,
+                               'top': parametres_profils['top']}, [], config)
+
+        groupe = groupes[(config.entite, config.ensembles, config.mesure)]
+        parametres_scores = {'profils': parametres_profils, 'ensembles': config.ensembles, 'mesure': config.mesure,
+                             'attributs': list(groupe['attributs']), 'plancher': groupe['plancher']}
+        cle_scores = ajouter('scores', parametres_scores,
+                             {'ensembles': config.ensembles, 'mesure': config.mesure,
+                              'attributs': list(groupe['attributs']), 'plancher': groupe['plancher']},
+                             [cle_profils], config)
+
+        parametres_graphe = {'scores': parametres_scores, 'top': config.top, 'poids': config.poids,
+                             'seuil': config.seuil, 'composante': config.composante}
+        cle_graphe = ajouter('graphe', parametres_graphe,
+                             {'top': config.top, 'poids': config.poids, 'seuil': config.seuil,
+                              'composante': config.composante}, [cle_scores], config)
+
+        parametres_partition = {'graphe': parametres_graphe, 'resolution': config.resolution,
+                                'graine': config.graine, 'methode': config.communautes}
+        cle_partition = ajouter('partition', parametres_partition,
+                                {'resolution': config.resolution, 'graine': config.graine,
+                                 'methode': config.communautes}, [cle_graphe], config)
+
+        chaines[config.nom] = [cle_profils, cle_scores, cle_graphe, cle_partition]
+    return list(taches.values()), chaines
+
+
+# Taille en Mo d'un résultat (tableaux numpy, matrices creuses, dictionnaires et listes)
+def taille_mo(objet):
+    if isinstance(objet, np.ndarray):
+        return objet.nbytes / 1024 ** 2
+    if sp.issparse(objet):
+        return (objet.data.nbytes + objet.indices.nbytes + objet.indptr.nbytes) / 1024 ** 2
+    if isinstance(objet, dict):
+        return sum(taille_mo(v) for v in objet.values())
+    if isinstance(objet, (list, tuple)):
+        return sum(taille_mo(v) for v in objet) if len(objet) < 100 else len(objet) * 100 / 1024 ** 2
+    return 0.0
+
+
+# Estimation haute (Mo) de la mémoire d'une tâche, faite au moment de la lancer à partir
+# des résumés de ses entrées : profils ~ 4 fois le fichier source ; scores ~ un bloc de
+# produits creux plus toutes les paires (borne dense, le plancher en élimine en pratique
+# beaucoup) ; graphe ~ 3 fois ses scores ; partition ~ 6 fois le graphe
+def estimer_memoire(tache, resumes):
+    if tache.etape == 'profils':
+        return MEMOIRE_BASE + 4 * os.path.getsize(tache.arguments['chemin']) / 1024 ** 2
+    if tache.etape == 'scores':
+        n = resumes[0]['entites']
+        attributs = len(tache.arguments['attributs'])
+        paires = n * (n - 1) / 2 * (8 + 8 * attributs)
+        bloc = min(n, TAILLE_BLOC) * n * attributs * 16
+        return MEMOIRE_BASE + resumes[0]['taille_mo'] + (paires + bloc) / 1024 ** 2
+    if tache.etape == 'graphe':
+        return MEMOIRE_BASE + 3 * resumes[0]['taille_mo']
+    return MEMOIRE_BASE + 6 * resumes[0]['taille_mo']
+
+
+# Sans processus (ou sans fork), les tâches s'exécutent une à une dans le processus courant
+class _ExecuteurSequentiel:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fonction, *args):
+        futur = Future()
+        futur.set_result(fonction(*args))
+        return futur
+
+
+# Exécuter le graphe de tâches : une tâche part dès que ses dépendances sont calculées,
+# s'il reste un processus libre et si son estimation tient dans le budget mémoire avec
+# celles des tâches en cours (une tâche seule part toujours, même au-delà du budget).
+# Les tâches prêtes partent dans l'ordre du graphe, sans dépassement, pour qu'une grosse
+# tâche ne soit pas indéfiniment doublée par des petites. Un résultat intermédiaire est
+# libéré dès que toutes les tâches qui en dépendent sont terminées. Avec plusieurs
+# processus, les résultats passent par un dépôt temporaire sur disque (deposer /
+# reprendre) au lieu d'être sérialisés à chaque envoi vers un processus.
+def executer_dag(taches, nb_processus=None, budget_memoire=None, progression=True):
+    nb_processus = nb_processus or os.cpu_count()
+    budget_memoire = budget_memoire or np.inf
+    if 'fork' not in mp.get_all_start_methods():
+        nb_processus = 1
+
+    dependants = {t.cle: 0 for t in taches}
+    for tache in taches:
+        for cle in tache.dependances:
+            dependants[cle] += 1
+
+    resultats, mesures = {}, {}
+    attente = list(taches)
+    en_cours = {}
+    memoire_utilisee = 0.0
+    depot = None
+    if nb_processus > 1:
+        executeur = ProcessPoolExecutor(nb_processus, mp_context=mp.get_context('fork'))
+        depot = tempfile.mkdtemp(prefix="grille_")
+    else:
+        executeur = _ExecuteurSequentiel()
+
+    try:
+        with executeur:
+            while attente or en_cours:
+                for tache in [t for t in attente if all(d in mesures for d in t.dependances)]:
+                    if len(en_cours) >= nb_processus:
+                        break
+                    estimation = estimer_memoire(tache, [mesures[d] for d in tache.dependances])
+                    if en_cours and memoire_utilisee + estimation > budget_memoire:
+                        break
+                    attente.remove(tache)
+                    futur = executeur.submit(_executer_tache, tache.cle, tache.etape, tache.arguments,
+                                             [resultats[d] for d in tache.dependances], depot)
+                    en_cours[futur] = (tache, estimation)
+                    memoire_utilisee += estimation
+
+                termines, _ = wait(list(en_cours), return_when=FIRST_COMPLETED)
+                for futur in termines:
+                    tache, estimation = en_cours.pop(futur)
+                    memoire_utilisee -= estimation
+                    resultat, resume, duree, pic = futur.result()
+                    resultats[tache.cle] = resultat
+                    mesures[tache.cle] = {'etape': tache.etape, 'duree_s': duree, 'rss_max_mo': pic,
+                                          'estimation_mo': estimation, **resume}
+                    for cle in tache.dependances:
+                        dependants[cle] -= 1
+                        if not dependants[cle]:
+                            del resultats[cle]
+                            if depot:
+                                shutil.rmtree(os.path.join(depot, cle), ignore_errors=True)
+                    if progression:
+                        print(f"[{len(mesures)}/{len(taches)}] {tache.etape} {duree:.2f}s "
+                              f"({', '.join(tache.configurations[:3])}"
+                              f"{'...' if len(tache.configurations) > 3 else ''})")
+        # Résultats finaux (partitions) recopiés en mémoire avant suppression du dépôt
+        if depot:
+            resultats = {cle: _copier(reprendre(*reference)) for cle, reference in resultats.items()}
+    finally:
+        if depot:
+            shutil.rmtree(depot, ignore_errors=True)
+    return resultats, mesures
+
+
+# Copie en mémoire d'un résultat repris du dépôt
+def _copier(resultat):
+    if isinstance(resultat, dict):
+        return {nom: valeur.copy() if isinstance(valeur, np.ndarray) or sp.issparse(valeur) else valeur
+                for nom, valeur in resultat.items()}
+    return resultat
+
+
+# Tableau de comparaison : une ligne par configuration (paramètres, taille du composant,
+# communautés, modularité). duree_s est la durée de sa chaîne de tâches ; duree_partagee_s
+# répartit chaque tâche entre les configurations qui l'ont partagée.
+def comparer_configurations(configurations, taches, chaines, mesures):
+    partage = {t.cle: len(t.configurations) for t in taches}
+    lignes = []
+    for config in configurations:
+        chaine = chaines[config.nom]
+        graphe, partition = mesures[chaine[2]], mesures[chaine[3]]
+        ligne = asdict(config)
+        ligne['poids'] = ",".join(f"{a}={w}" for a, w in config.poids.items())
+        ligne.update({
+            'noeuds': graphe['noeuds'],
+            'aretes': graphe['aretes'],
+            'communautes': partition['communautes'],
+            'modularite': partition['modularite'],
+            'duree_s': sum(mesures[c]['duree_s'] for c in chaine),
+            'duree_partagee_s': sum(mesures[c]['duree_s'] / partage[c] for c in chaine),
+            'rss_max_mo': max((mesures[c]['rss_max_mo'] or 0.0) for c in chaine) or None,
+        })
+        lignes.append(ligne)
+    return pd.DataFrame(lignes)
+
+
+# Exécuter une grille de configurations et renvoyer le tableau de comparaison
+def executer_grille(configurations, chemin=FICHIER_DONNEES, flux=None, nb_processus=None, budget_memoire=None,
+                    progression=True):
+    taches, chaines = construire_dag(configurations, chemin, flux)
+    _, mesures = executer_dag(taches, nb_processus, budget_memoire, progression)
+    return comparer_configurations(configurations, taches, chaines, mesures), taches
+
+
+def analyser_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Grille de configurations du graphe de similarité")
+    parser.add_argument('--donnees', default=FICHIER_DONNEES)
+    parser.add_argument('--flux', type=int, default=None, metavar='LIGNES')
+    parser.add_argument('--variante', choices=sorted(VARIANTES), default='outlets',
+                        help="configuration de base dont la grille fait varier les paramètres")
+    parser.add_argument('--top', type=int, nargs='+', default=None)
+    parser.add_argument('--seuil', type=float, nargs='+', default=None)
+    parser.add_argument('--resolution', type=float, nargs='+', default=None)
+    parser.add_argument('--graine', type=int, nargs='+', default=None)
+    parser.add_argument('--poids', type=lire_poids, nargs='+', default=None)
+    parser.add_argument('--mesure', choices=MESURES, nargs='+', default=None)
+    parser.add_argument('--communautes', choices=METHODES_COMMUNAUTES, nargs='+', default=None)
+    parser.add_argument('--processus', type=int, default=None, help="nombre de processus (défaut : un par cœur)")
+    parser.add_argument('--budget-memoire', type=float, default=None, metavar='MO',
+                        help="mémoire estimée maximale des tâches exécutées en même temps")
+    parser.add_argument('--sortie', default=DOSSIER_GRILLE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = analyser_arguments(argv)
+    configurations = grille(VARIANTES[args.variante], top=args.top, seuil=args.seuil, resolution=args.resolution,
+                            graine=args.graine, poids=args.poids, mesure=args.mesure, communautes=args.communautes)
+
+    debut = time.perf_counter()
+    tableau, taches = executer_grille(configurations, args.donnees, args.flux, args.processus, args.budget_memoire)
+    duree = time.perf_counter() - debut
+
+    os.makedirs(args.sortie, exist_ok=True)
+    tableau.to_csv(os.path.join(args.sortie, FICHIER_COMPARAISON), index=False)
+    colonnes = ['nom', 'noeuds', 'aretes', 'communautes', 'modularite', 'duree_s', 'duree_partagee_s']
+    print(tableau.sort_values('modularite', ascending=False)[colonnes].to_string(index=False))
+    print(f"{len(configurations)} configurations, {len(taches)} tâches (au lieu de {4 * len(configurations)}), "
+          f"{duree:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
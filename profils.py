@@ -0,0 +1,122 @@
+import warnings
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+
+# Colonnes du jeu de données utilisées pour construire les profils
+COLONNES_PROFIL = ['keywords', 'country', 'target_language', 'publication_date']
+
+# Attributs ensemblistes d'un Profil, comparables entre entités
+ATTRIBUTS = ('mots_cles', 'pays', 'langues', 'annees')
+
+# Format des dates de publication (jj/mm/aaaa)
+FORMAT_DATE = '%d/%m/%Y'
+
+# Colonnes dont on garde la valeur brute de la première occurrence
+# (utilisées par les scripts qui comparent avec .iloc[0])
+COLONNES_PREMIERE_LIGNE = ['keywords', 'country', 'target_language']
+
+
+# Profil agrégé d'une entité (outlet, mot-clé, pays...)
+@dataclass
+class Profil:
+    nb_lignes: int = 0
+    mots_cles: set = field(default_factory=set)
+    pays: set = field(default_factory=set)
+    langues: set = field(default_factory=set)
+    annees: set = field(default_factory=set)
+    premiere_ligne: dict = field(default_factory=dict)
+
+
+# Découper une colonne "a,b,c" en une ligne par jeton (sans espaces ni jetons vides)
+def decouper_liste(serie):
+    jetons = serie.dropna().astype(str).str.split(',').explode().str.strip()
+    return jetons[jetons != '']
+
+
+# Analyser une colonne de dates en une seule passe : chaque valeur distincte n'est
+# analysée qu'une fois, au format explicite FORMAT_DATE (les dates ISO aaaa-mm-jj
+# sont aussi acceptées, et les autres dispositions sont relues jour en premier comme
+# dans les scripts d'origine), puis le résultat est redistribué sur toutes les lignes
+def analyser_dates(serie):
+    codes, valeurs = pd.factorize(serie)
+    valeurs = pd.Series(valeurs, dtype=object).astype(str)
+    dates = pd.to_datetime(valeurs, format=FORMAT_DATE, errors='coerce')
+    iso = dates.isna() & valeurs.str.match(r'\d{4}-\d{1,2}-\d{1,2}')
+    if iso.any():
+        dates[iso] = pd.to_datetime(valeurs[iso], format='ISO8601', errors='coerce')
+    autres = dates.isna()
+    if autres.any():
+        dates[autres] = pd.to_datetime(valeurs[autres], format='mixed', dayfirst=True, errors='coerce')
+        illisibles = np.isin(codes, np.flatnonzero(dates.isna())).sum()
+        if illisibles:
+            warnings.warn(f"{illisibles} dates illisibles ignorées dans '{serie.name}' "
+                          f"(ex. {valeurs[dates.isna()].iloc[0]!r})")
+    dates = pd.api.extensions.take(dates.to_numpy(), codes, allow_fill=True)
+    return pd.Series(dates, index=serie.index, name=serie.name)
+
+
+# Regrouper une série de valeurs en un ensemble par entité
+def _ensembles_par_entite(cles, valeurs):
+    valeurs = valeurs.dropna().astype(object)
+    if valeurs.empty:
+        return {}
+    return valeurs.groupby(cles.loc[valeurs.index], sort=False, observed=True).agg(set).to_dict()
+
+
+# Les n entités les plus fréquentes d'une colonne (comme value_counts().head(n)),
+# les égalités étant départagées par ordre d'apparition quel que soit le dtype
+def entites_frequentes(serie, n=None):
+    comptes = serie.dropna().astype(object).value_counts(sort=False)
+    return comptes.sort_values(ascending=False, kind='stable').head(n).index.tolist()
+
+
+# Construire en une seule passe les profils de toutes les entités d'une colonne
+# (par ex. 'outlet', 'keywords' ou 'normalized_country')
+def construire_profils(df, colonne, entites=None):
+    if entites is not None:
+        df = df[df[colonne].isin(entites)]
+    df = df[df[colonne].notna()]
+    cles = df[colonne]
+
+    # Colonnes dérivées du cache (chargement.py) si elles sont présentes
+    if 'liste_mots_cles' in df:
+        mots_cles = df['liste_mots_cles'].explode().dropna()
+    else:
+        mots_cles = decouper_liste(df['keywords'])
+    if 'date' in df:
+        annees = df['date'].dt.year
+    else:
+        annees = analyser_dates(df['publication_date']).dt.year
+
+    ensembles = {
+        'mots_cles': _ensembles_par_entite(cles, mots_cles),
+        'pays': _ensembles_par_entite(cles, df['country']),
+        'langues': _ensembles_par_entite(cles, df['target_language']),
+        'annees': _ensembles_par_entite(cles, annees.astype('Int64')),
+    }
+    nb_lignes = cles.value_counts(sort=False).to_dict()
+    premieres = df.drop_duplicates(colonne)
+
+    profils = {}
+    for entite, ligne in zip(premieres[colonne], premieres[COLONNES_PREMIERE_LIGNE].to_dict('records')):
+        profils[entite] = Profil(
+            nb_lignes=nb_lignes[entite],
+            mots_cles=ensembles['mots_cles'].get(entite, set()),
+            pays=ensembles['pays'].get(entite, set()),
+            langues=ensembles['langues'].get(entite, set()),
+            annees={int(a) for a in ensembles['annees'].get(entite, set())},
+            premiere_ligne=ligne,
+        )
+    return profils
+
+
+# Pays principal d'une ligne : le premier des pays combinés ("Ukraine, Russia" -> "Ukraine")
+# (un pays manquant devient l'entité "nan", comme avec str() ligne par ligne)
+def pays_principal(serie):
+    return serie.astype(object).map(str).str.split(',').str[0].str.strip()
+
+
+# Découper une valeur brute "a, b" en liste (vide si la valeur est manquante)
+def valeurs_liste(valeur):
+    return [v.strip() for v in str(valeur).split(',')] if pd.notna(valeur) else []
@@ -0,0 +1,208 @@
+import networkx as nx
+import numpy as np
+from collections import defaultdict
+
+
+# Labels stratégiques : les nœuds de plus fort degré, au plus max_par_comm par communauté
+# (degres : degrés déjà calculés, par exemple par analyses.py)
+def labels_strategiques(G, partition, max_par_comm=5, degres=None):
+    degrees = degres if degres is not None else dict(G.degree())
+    labels_to_show = {}
+    comm_counts = defaultdict(int)
+    central_nodes = sorted(G.nodes(), key=lambda x: degrees[x], reverse=True)
+
+    for node in central_nodes:
+        comm = partition[node]
+        if comm_counts[comm] < max_par_comm:
+            labels_to_show[node] = str(node).split('.')[0][:15]  # Raccourcir davantage
+            comm_counts[comm] += 1
+    return labels_to_show
+
+
+# Dessiner le réseau avec ses communautés (matplotlib n'est importé qu'ici,
+# pour que les traitements sans rendu ne paient pas son chargement)
+# entites : nom des nœuds au pluriel, pour le titre
+def dessiner_reseau(G, partition, seuil, max_labels_par_comm=5, fichier='network_final.png', afficher=True, pos=None,
+                    degres=None, entites='outlets'):
+    import matplotlib.pyplot as plt
+
+    # Création de la figure avec espace pour colorbar
+    plt.figure(figsize=(16, 12))
+    plt.rcParams.update({'font.size': 8})
+    grid = plt.GridSpec(1, 2, width_ratios=[0.9, 0.05])
+    ax = plt.subplot(grid[0])
+
+    # Layout
+    if pos is None:
+        pos = nx.spring_layout(G, k=0.5, iterations=100, seed=42)
+
+    # Couleurs et tailles
+    cmap = plt.cm.tab20
+    node_colors = [partition[n] for n in G.nodes()]
+    degrees = degres if degres is not None else dict(G.degree())
+    node_sizes = [300 + 1000 * degrees[n]/max(degrees.values()) for n in G.nodes()]
+
+    # Dessin du graphe
+    nx.draw_networkx_nodes(G, pos,
+                          node_color=node_colors,
+                          cmap=cmap,
+                          node_size=node_sizes,
+                          alpha=0.9,
+                          edgecolors='black',
+                          linewidths=0.5,
+                          ax=ax)
+
+    # Épaisseur relative au poids maximal (jusqu'à 2) : les poids de comptage
+    # (éléments communs) ne sont pas bornés par 1 comme les scores de Jaccard
+    poids = np.array([G[u][v]['weight'] for u, v in G.edges()], dtype=np.float64)
+    edge_weights = 2 * poids / max(poids.max(initial=0), 1e-12)
+    nx.draw_networkx_edges(G, pos,
+                          width=edge_weights,
+                          alpha=0.1 + 0.3*edge_weights/max(edge_weights.max(initial=0), 1e-12),
+                          edge_color='lightgray',
+                          ax=ax)
+
+    # Labels stratégiques
+    nx.draw_networkx_labels(G, pos,
+                           labels=labels_strategiques(G, partition, max_labels_par_comm, degrees),
+                           font_size=9,
+                           font_weight='bold',
+                           bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'),
+                           ax=ax)
+
+    # Colorbar
+    cax = plt.subplot(grid[1])
+    sm = plt.cm.ScalarMappable(cmap=cmap,
+                              norm=plt.Normalize(vmin=min(node_colors),
+                                               vmax=max(node_colors)))
+    sm.set_array([])
+    plt.colorbar(sm, cax=cax, label='Communauté')
+
+    # Titre et ajustement
+    plt.suptitle(f"Réseau des {len(G.nodes())} principaux {entites}\n"
+                f"Communautés détectées (seuil: {seuil})",
+                y=0.95, fontsize=12)
+    plt.tight_layout()
+    if fichier:
+        plt.savefig(fichier, dpi=300, bbox_inches='tight')
+    if afficher:
+        plt.show()
+    return pos
+
+
+# Coordonnées pixel (colonne, ligne) des positions, avec une marge autour du dessin
+def _en_pixels(P, largeur, hauteur, marge=0.05):
+    mini = P.min(axis=0)
+    etendue = np.maximum(P.max(axis=0) - mini, 1e-12)
+    relatif = (P - mini) / etendue
+    x = (marge + (1 - 2 * marge) * relatif[:, 0]) * (largeur - 1)
+    y = (marge + (1 - 2 * marge) * (1 - relatif[:, 1])) * (hauteur - 1)
+    return np.column_stack([x, y])
+
+
+# Densité des arêtes accumulée sur la grille de pixels : chaque arête est échantillonnée
+# environ une fois par pixel de longueur, par paquets pour borner la mémoire
+def raster_aretes(P, sources, cibles, poids, largeur, hauteur, taille_paquet=1_000_000):
+    canevas = np.zeros(largeur * hauteur)
+    longueurs = np.ceil(np.linalg.norm(P[cibles] - P[sources], axis=1)).astype(np.int64) + 1
+    cumul = np.cumsum(longueurs)
+    debut = 0
+    while debut < len(sources):
+        # Assez d'arêtes pour remplir un paquet d'échantillons (cumul décalé des paquets déjà tracés)
+        decalage = cumul[debut - 1] if debut else 0
+        fin = max(debut + 1, int(np.searchsorted(cumul, decalage + taille_paquet, side='right')))
+        nombres = longueurs[debut:fin]
+        arete = np.repeat(np.arange(debut, fin), nombres)
+        rang = np.arange(len(arete)) - np.repeat(np.cumsum(nombres) - nombres, nombres)
+        t = (rang / np.maximum(nombres - 1, 1)[arete - debut])[:, None]
+        points = P[sources[arete]] * (1 - t) + P[cibles[arete]] * t
+        colonnes = np.clip(np.rint(points[:, 0]).astype(np.int64), 0, largeur - 1)
+        lignes = np.clip(np.rint(points[:, 1]).astype(np.int64), 0, hauteur - 1)
+        canevas += np.bincount(lignes * largeur + colonnes, weights=poids[arete], minlength=largeur * hauteur)
+        debut = fin
+    return canevas.reshape(hauteur, largeur)
+
+
+# Nœuds tamponnés en disques de couleur (moyenne des couleurs quand ils se recouvrent)
+def raster_noeuds(P, couleurs, rayons, largeur, hauteur):
+    somme = np.zeros((largeur * hauteur, 3))
+    nombre = np.zeros(largeur * hauteur)
+    for rayon in np.unique(rayons):
+        dx, dy = np.meshgrid(np.arange(-rayon, rayon + 1), np.arange(-rayon, rayon + 1))
+        disque = dx ** 2 + dy ** 2 <= rayon ** 2
+        dx, dy = dx[disque], dy[disque]
+        selection = np.flatnonzero(rayons == rayon)
+        colonnes = np.rint(P[selection, 0])[:, None].astype(np.int64) + dx
+        lignes = np.rint(P[selection, 1])[:, None].astype(np.int64) + dy
+        dedans = (colonnes >= 0) & (colonnes < largeur) & (lignes >= 0) & (lignes < hauteur)
+        indices = (lignes * largeur + colonnes)[dedans]
+        noeud = np.broadcast_to(selection[:, None], dedans.shape)[dedans]
+        for canal in range(3):
+            somme[:, canal] += np.bincount(indices, weights=couleurs[noeud, canal], minlength=largeur * hauteur)
+        nombre += np.bincount(indices, minlength=largeur * hauteur)
+    return somme.reshape(hauteur, largeur, 3), nombre.reshape(hauteur, largeur)
+
+
+# Rendu rasterisé pour les grands réseaux : arêtes et nœuds sont accumulés dans une image
+# numpy (coût proportionnel à la taille de l'image), puis seuls l'image et les labels
+# stratégiques passent par matplotlib
+def dessiner_reseau_raster(G, partition, seuil, max_labels_par_comm=5, fichier='network_final.png', afficher=True,
+                           pos=None, largeur=3200, hauteur=2400, degres=None, entites='outlets'):
+    import matplotlib.pyplot as plt
+
+    if pos is None:
+        pos = nx.spring_layout(G, k=0.5, iterations=100, seed=42)
+    noeuds = list(G.nodes())
+    indice = {n: i for i, n in enumerate(noeuds)}
+    P = _en_pixels(np.array([pos[n] for n in noeuds]), largeur, hauteur)
+
+    # Arêtes : densité pondérée, en échelle logarithmique
+    aretes = [(indice[u], indice[v], d.get('weight', 1.0)) for u, v, d in G.edges(data=True)]
+    image = np.ones((hauteur, largeur, 3))
+    if aretes:
+        sources, cibles, poids = (np.array(x) for x in zip(*aretes))
+        densite = raster_aretes(P, sources.astype(np.int64), cibles.astype(np.int64),
+                                poids.astype(np.float64), largeur, hauteur)
+        intensite = np.log1p(densite) / np.log1p(densite.max())
+        alpha = np.where(densite > 0, 0.1 + 0.6 * intensite, 0.0)[..., None]
+        image = image * (1 - alpha) + np.array([0.55, 0.55, 0.55]) * alpha
+
+    # Nœuds : couleur de communauté, rayon selon le degré
+    cmap = plt.cm.tab20
+    communautes = np.array([partition[n] for n in noeuds])
+    norme = plt.Normalize(vmin=communautes.min(), vmax=communautes.max())
+    couleurs = cmap(norme(communautes))[:, :3]
+    if degres is None:
+        degres = dict(G.degree())
+    valeurs_degres = np.array([degres[n] for n in noeuds], dtype=np.float64)
+    echelle = max(largeur, hauteur) / 1600
+    rayons = np.rint((2 + 5 * valeurs_degres / max(valeurs_degres.max(), 1)) * echelle).astype(np.int64)
+    somme, nombre = raster_noeuds(P, couleurs, rayons, largeur, hauteur)
+    couverts = nombre > 0
+    image[couverts] = 0.1 * image[couverts] + 0.9 * somme[couverts] / nombre[couverts][:, None]
+
+    # Composition : image + labels stratégiques + colorbar
+    dpi = 200
+    figure = plt.figure(figsize=(largeur / dpi * 1.06, hauteur / dpi), dpi=dpi)
+    grid = plt.GridSpec(1, 2, width_ratios=[0.95, 0.02])
+    ax = plt.subplot(grid[0])
+    ax.imshow(np.clip(image, 0, 1), interpolation='nearest')
+    for node, label in labels_strategiques(G, partition, max_labels_par_comm, degres).items():
+        x, y = P[indice[node]]
+        ax.text(x, y, label, fontsize=9, fontweight='bold', ha='center', va='center',
+                bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'))
+    ax.axis('off')
+
+    cax = plt.subplot(grid[1])
+    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norme)
+    sm.set_array([])
+    plt.colorbar(sm, cax=cax, label='Communauté')
+
+    plt.suptitle(f"Réseau des {len(noeuds)} principaux {entites}\n"
+                f"Communautés détectées (seuil: {seuil})",
+                y=0.97, fontsize=12)
+    if fichier:
+        figure.savefig(fichier, dpi=dpi, bbox_inches='tight')
+    if afficher:
+        plt.show()
+    return pos
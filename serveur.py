@@ -0,0 +1,321 @@
+import argparse
+import inspect
+import json
+import os
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from communautes import adjacence
+from magasin_profils import FICHIER_META, MagasinProfils, version_actuelle
+from similarite import _k_meilleurs, scores_lignes
+
+# Taille du cache des réponses (requêtes distinctes gardées) et limites par défaut
+TAILLE_CACHE = 4096
+LIMITE_VOISINS = 20
+K_SIMILAIRES = 10
+LIMITE_MEMBRES = 50
+RAYON_MAX = 3
+NOEUDS_EGO_MAX = 500
+
+
+# Entité absente du graphe ou du magasin (réponse 404)
+class EntiteInconnue(LookupError):
+    pass
+
+
+# Paramètre de requête absent, inattendu ou invalide (réponse 400) ; les autres
+# exceptions, y compris ValueError et TypeError, sont des erreurs internes (500)
+class ParametreInvalide(ValueError):
+    pass
+
+
+# Paramètre entier d'une requête
+def entier(valeur, nom):
+    try:
+        return int(valeur)
+    except (TypeError, ValueError):
+        raise ParametreInvalide(f"{nom} doit être un entier : {valeur!r}") from None
+
+
+# Paramètre entier strictement positif d'une requête
+def entier_positif(valeur, nom):
+    valeur = entier(valeur, nom)
+    if valeur <= 0:
+        raise ParametreInvalide(f"{nom} doit être un entier strictement positif")
+    return valeur
+
+
+# Vérifier les noms de paramètres d'une requête contre la signature de sa route
+def verifier_parametres(route, noms):
+    signature = inspect.signature(route).parameters
+    inconnus = sorted(set(noms) - set(signature))
+    if inconnus:
+        raise ParametreInvalide(f"paramètres inconnus : {', '.join(inconnus)} (attendus : {', '.join(signature)})")
+    manquants = [n for n, p in signature.items() if p.default is inspect.Parameter.empty and n not in noms]
+    if manquants:
+        raise ParametreInvalide(f"paramètres manquants : {', '.join(manquants)}")
+
+
+# Lire une table exportée (Parquet, ou CSV si pyarrow manquait à l'export) ; None si absente
+def lire_table(dossier, nom):
+    for extension, lire in (('.parquet', pd.read_parquet), ('.csv', pd.read_csv)):
+        chemin = os.path.join(dossier, nom + extension)
+        if os.path.exists(chemin):
+            return lire(chemin)
+    return None
+
+
+# Graphe, partition et métriques exportés par pipeline.py dans `dossier`, indexés en
+# mémoire pour les requêtes :
+# - matrice d'adjacence CSR dont chaque ligne est triée par poids décroissant (les
+#   voisins d'une entité sont une tranche de tableau) ;
+# - membres de chaque communauté triés par PageRank (à défaut par degré) ;
+# - magasin de profils projeté en mémoire (optionnel) pour les k entités les plus
+#   similaires, graphe ou non ; sans lui, les similaires sont les voisins du graphe.
+# Les réponses sont gardées dans un cache LRU, partagé par les fils du serveur (les
+# erreurs internes ne sont pas gardées).
+class IndexGraphe:
+    def __init__(self, dossier, magasin=None, taille_cache=TAILLE_CACHE):
+        with open(os.path.join(dossier, 'communautes.json'), encoding='utf-8') as f:
+            self.resume = json.load(f)
+        parametres = self.resume['parametres']
+        self.poids = parametres.get('poids') or {}
+        self.mesure = parametres.get('mesure', 'jaccard')
+
+        partition = lire_table(dossier, 'partition')
+        self.noeuds = partition['entite'].astype(str).tolist()
+        self.indice = {n: i for i, n in enumerate(self.noeuds)}
+        self.etiquettes = partition['communaute'].to_numpy()
+        chemin_adjacence = os.path.join(dossier, 'adjacence.npz')
+        if os.path.exists(chemin_adjacence):
+            A = sp.load_npz(chemin_adjacence).tocsr()
+        else:
+            A, _ = adjacence(nx.read_graphml(os.path.join(dossier, 'graphe.graphml')), self.noeuds)
+        self.A = self._trier_lignes(sp.csr_matrix(A))
+
+        metriques = lire_table(dossier, 'metriques_noeuds')
+        if metriques is not None:
+            metriques = metriques.set_index(metriques['entite'].astype(str)).reindex(self.noeuds)
+        self.metriques = metriques
+        communautes = lire_table(dossier, 'metriques_communautes')
+        self.communautes = ({} if communautes is None else
+                            {int(c['communaute']): c for c in communautes.drop(columns='principaux')
+                             .to_dict('records')})
+        importance = (metriques['pagerank'].to_numpy() if metriques is not None
+                      else np.diff(self.A.indptr).astype(np.float64))
+        ordre = np.lexsort((np.arange(len(self.noeuds)), -importance, self.etiquettes))
+        valeurs, debuts = np.unique(self.etiquettes[ordre], return_index=True)
+        self.membres = dict(zip(valeurs.tolist(), np.split(ordre, debuts[1:])))
+
+        if magasin is None and os.path.exists(os.path.join(version_actuelle(os.path.join(dossier, 'magasin')),
+                                                            FICHIER_META)):
+            magasin = os.path.join(dossier, 'magasin')
+        self.magasin = None
+        if magasin:
+            self.magasin = MagasinProfils(magasin)
+            self.indice_magasin = {e: i for i, e in enumerate(self.magasin.entites)}
+            self.matrices, self.tailles = self.magasin.encoder(self.poids)
+
+        self._repondre_cache = lru_cache(maxsize=taille_cache)(self._repondre)
+        self.routes = {'/voisins': self.voisins, '/similaires': self.similaires, '/communaute': self.communaute,
+                       '/ego': self.ego, '/entite': self.entite, '/sante': self.sante}
+
+    # Lignes CSR triées par poids décroissant (à poids égal, par indice croissant), en un tri
+    @staticmethod
+    def _trier_lignes(A):
+        lignes = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+        ordre = np.lexsort((A.indices, -A.data, lignes))
+        return sp.csr_matrix((A.data[ordre], A.indices[ordre], A.indptr), shape=A.shape)
+
+    def _position(self, entite):
+        if entite not in self.indice:
+            raise EntiteInconnue(f"entité inconnue : {entite!r}")
+        return self.indice[entite]
+
+    def _voisinage(self, i):
+        debut, fin = self.A.indptr[i], self.A.indptr[i + 1]
+        return self.A.indices[debut:fin], self.A.data[debut:fin]
+
+    # Réponse (statut HTTP, corps JSON) d'une requête ; parametres : tuple trié de
+    # paires (nom, valeur) pour servir de clé au cache (sauf /sante, toujours recalculée).
+    # Une exception imprévue donne une réponse 500 au lieu de couper la connexion.
+    def repondre(self, chemin, parametres):
+        try:
+            if chemin == '/sante':
+                return 200, self._encoder(self.sante())
+            return self._repondre_cache(chemin, parametres)
+        except Exception as e:
+            return 500, self._encoder({'erreur': f"erreur interne : {type(e).__name__}: {e}"})
+
+    def _repondre(self, chemin, parametres):
+        route = self.routes.get(chemin)
+        if route is None:
+            return 404, self._encoder({'erreur': f"route inconnue : {chemin}", 'routes': sorted(self.routes)})
+        try:
+            parametres = dict(parametres)
+            verifier_parametres(route, parametres)
+            return 200, self._encoder(route(**parametres))
+        except EntiteInconnue as e:
+            return 404, self._encoder({'erreur': e.args[0]})
+        except ParametreInvalide as e:
+            return 400, self._encoder({'erreur': str(e)})
+
+    @staticmethod
+    def _encoder(resultat):
+        return json.dumps(resultat, ensure_ascii=False, default=float).encode('utf-8')
+
+    # Fiche d'une entité : communauté, degré et métriques exportées
+    def entite(self, entite):
+        i = self._position(entite)
+        fiche = {'entite': entite, 'communaute': int(self.etiquettes[i]),
+                 'degre': int(self.A.indptr[i + 1] - self.A.indptr[i])}
+        if self.metriques is not None:
+            ligne = self.metriques.iloc[i]
+            fiche.update({c: float(ligne[c]) for c in ('force', 'pagerank', 'intermediarite') if c in ligne})
+        return fiche
+
+    # Voisins d'une entité dans le graphe, par poids décroissant
+    def voisins(self, entite, limite=LIMITE_VOISINS):
+        i = self._position(entite)
+        colonnes, poids = self._voisinage(i)
+        limite = entier_positif(limite, 'limite')
+        return {'entite': entite, 'degre': len(colonnes),
+                'voisins': [{'entite': self.noeuds[j], 'poids': float(w), 'communaute': int(self.etiquettes[j])}
+                            for j, w in zip(colonnes[:limite].tolist(), poids[:limite].tolist())]}
+
+    # Les k entités les plus similaires (scores recalculés sur le magasin de profils
+    # contre toutes ses entités, sinon voisins du graphe de plus fort poids)
+    def similaires(self, entite, k=K_SIMILAIRES):
+        k = entier_positif(k, 'k')
+        if self.magasin is None:
+            colonnes, poids = self._voisinage(self._position(entite))
+            return {'entite': entite, 'source': 'graphe',
+                    'similaires': [{'entite': self.noeuds[j], 'score': float(w)}
+                                   for j, w in zip(colonnes[:k].tolist(), poids[:k].tolist())]}
+        if entite not in self.indice_magasin:
+            raise EntiteInconnue(f"entité absente du magasin : {entite!r}")
+        i = self.indice_magasin[entite]
+        ligne = scores_lignes(self.matrices, self.tailles, self.poids, [i], self.mesure).tocsr()
+        garder = (ligne.indices != i) & (ligne.data > 0)
+        colonnes, scores = _k_meilleurs(ligne.indices[garder], ligne.data[garder], k)
+        entites = self.magasin.entites
+        return {'entite': entite, 'source': 'magasin',
+                'similaires': [{'entite': entites[j], 'score': float(s), 'dans_graphe': entites[j] in self.indice}
+                               for j, s in zip(colonnes.tolist(), scores.tolist())]}
+
+    # Communauté d'une entité (ou de numéro `id`) : agrégats exportés et principaux membres
+    def communaute(self, entite=None, id=None, limite=LIMITE_MEMBRES):
+        if (entite is None) == (id is None):
+            raise ParametreInvalide("préciser entite ou id")
+        numero = int(self.etiquettes[self._position(entite)]) if entite is not None else entier(id, 'id')
+        if numero not in self.membres:
+            raise EntiteInconnue(f"communauté inconnue : {numero}")
+        membres = self.membres[numero]
+        resultat = {'communaute': numero, 'taille': len(membres),
+                    'membres': [self.noeuds[j] for j in membres[:entier_positif(limite, 'limite')].tolist()]}
+        resultat.update({c: v for c, v in self.communautes.get(numero, {}).items() if c != 'communaute'})
+        return resultat
+
+    # Sous-graphe égocentré : entités à au plus `rayon` sauts (parcours en largeur sur la
+    # matrice CSR, tronqué à `max_noeuds` entités) et arêtes entre elles
+    def ego(self, entite, rayon=1, max_noeuds=NOEUDS_EGO_MAX):
+        rayon, max_noeuds = entier(rayon, 'rayon'), entier_positif(max_noeuds, 'max_noeuds')
+        if not 0 <= rayon <= RAYON_MAX:
+            raise ParametreInvalide(f"rayon entre 0 et {RAYON_MAX}")
+        i = self._position(entite)
+        vus = np.zeros(len(self.noeuds), dtype=bool)
+        vus[i] = True
+        couches, frontiere, tronque = [np.array([i])], np.array([i]), False
+        for _ in range(rayon):
+            if not len(frontiere) or sum(map(len, couches)) >= max_noeuds:
+                break
+            suivants = np.unique(self.A[frontiere].indices)
+            frontiere = suivants[~vus[suivants]]
+            vus[frontiere] = True
+            couches.append(frontiere)
+        noeuds = np.concatenate(couches)
+        if len(noeuds) > max_noeuds:
+            noeuds, tronque = noeuds[:max_noeuds], True
+        distances = np.concatenate([np.full(len(c), d) for d, c in enumerate(couches)])[:len(noeuds)]
+        sous = sp.triu(self.A[noeuds][:, noeuds], k=1).tocoo()
+        return {'entite': entite, 'rayon': rayon, 'tronque': tronque,
+                'noeuds': [{'entite': self.noeuds[j], 'communaute': int(self.etiquettes[j]), 'distance': int(d)}
+                           for j, d in zip(noeuds.tolist(), distances.tolist())],
+                'aretes': [[self.noeuds[noeuds[a]], self.noeuds[noeuds[b]], float(w)]
+                           for a, b, w in zip(sous.row.tolist(), sous.col.tolist(), sous.data.tolist())]}
+
+    # État du service : taille du graphe, magasin, occupation du cache
+    def sante(self):
+        cache = self._repondre_cache.cache_info()
+        return {'noeuds': len(self.noeuds), 'aretes': int(self.A.nnz // 2), 'communautes': len(self.membres),
+                'magasin': self.magasin.dossier if self.magasin else None,
+                'cache': {'succes': cache.hits, 'echecs': cache.misses, 'taille': cache.currsize,
+                          'taille_max': cache.maxsize}}
+
+
+# Requêtes GET : le chemin choisit la requête, la chaîne de requête donne ses paramètres
+# (/voisins?entite=X&limite=20, /similaires?entite=X&k=10, /communaute?entite=X ou ?id=3,
+# /ego?entite=X&rayon=2, /entite?entite=X, /sante). Connexions persistantes (HTTP/1.1) ;
+# en-têtes et corps partent en une écriture, sans attente de Nagle sur les petites réponses.
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parametres = tuple(sorted((nom, valeurs[-1]) for nom, valeurs in parse_qs(url.query).items()))
+        statut, corps = self.server.index.repondre(url.path.rstrip('/') or '/', parametres)
+        self.send_response(statut)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        if self.server.journal:
+            super().log_message(format, *args)
+
+
+# Serveur HTTP multi-fils (un fil par connexion) sur un index déjà chargé
+def creer_serveur(index, hote='127.0.0.1', port=8765, journal=False):
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireRequetes)
+    serveur.daemon_threads = True
+    serveur.index = index
+    serveur.journal = journal
+    return serveur
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service de requêtes sur un graphe exporté par pipeline.py")
+    parser.add_argument('dossier', help="dossier de sortie d'une configuration (graphe, partition, métriques)")
+    parser.add_argument('--magasin', default=None,
+                        help="magasin de profils pour /similaires (par défaut <dossier>/magasin s'il existe)")
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache', type=int, default=TAILLE_CACHE, help="réponses gardées dans le cache LRU")
+    parser.add_argument('--journal', action='store_true', help="afficher chaque requête")
+    args = parser.parse_args(argv)
+
+    debut = time.perf_counter()
+    index = IndexGraphe(args.dossier, args.magasin, args.cache)
+    print(f"{len(index.noeuds)} nœuds, {index.A.nnz // 2} arêtes, {len(index.membres)} communautés "
+          f"chargés en {time.perf_counter() - debut:.2f} s"
+          + (f" (magasin {index.magasin.dossier})" if index.magasin else ""))
+    serveur = creer_serveur(index, args.hote, args.port, args.journal)
+    print(f"Service sur http://{args.hote}:{args.port}/")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+
+
+if __name__ == '__main__':
+    main()
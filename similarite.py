@@ -0,0 +1,224 @@
+import numpy as np
+import scipy.sparse as sp
+from tqdm import tqdm
+from bitsets import intersections_unions, masques_csr, petit_vocabulaire
+from instrumentation import compter
+
+# Pondérations utilisées par les scripts (attribut du Profil -> poids)
+POIDS_TEXTE_GEO = {'mots_cles': 0.6, 'pays': 0.4}
+POIDS_QUATRE_VARIABLES = {'mots_cles': 0.4, 'pays': 0.25, 'langues': 0.2, 'annees': 0.15}
+
+
+# Fonction de similarité Jaccard
+def jaccard_similarity(set1, set2):
+    if not set1 or not set2:
+        return 0.0
+    return len(set1 & set2) / len(set1 | set2)
+
+
+# Score pondéré entre deux profils (version de référence, paire par paire)
+# mesure='jaccard' : somme des Jaccard pondérés
+# mesure='intersection' : somme pondérée du nombre d'éléments communs
+# mesure='presence' : somme des poids des attributs qui ont au moins un élément commun
+def similarite_profils(profil1, profil2, poids, mesure='jaccard'):
+    score = 0
+    for attribut, w in poids.items():
+        set1 = getattr(profil1, attribut)
+        set2 = getattr(profil2, attribut)
+        if mesure == 'jaccard':
+            score += w * jaccard_similarity(set1, set2)
+        elif mesure == 'presence':
+            score += w * bool(set1 & set2)
+        else:
+            score += w * len(set1 & set2)
+    return score
+
+
+# Encoder une liste d'ensembles en matrice binaire CSR (une ligne par ensemble)
+def matrice_binaire(ensembles, vocabulaire=None):
+    if vocabulaire is None:
+        vocabulaire = {}
+        for ensemble in ensembles:
+            for valeur in ensemble:
+                vocabulaire.setdefault(valeur, len(vocabulaire))
+    indptr = [0]
+    indices = []
+    for ensemble in ensembles:
+        indices.extend(vocabulaire[v] for v in ensemble if v in vocabulaire)
+        indptr.append(len(indices))
+    matrice = sp.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int64), np.array(indptr)),
+        shape=(len(ensembles), len(vocabulaire)),
+    )
+    return matrice, vocabulaire
+
+
+# Matrices binaires et tailles d'ensembles de chaque attribut pondéré
+def encoder_profils(profils, entites, attributs):
+    matrices = {}
+    tailles = {}
+    for attribut in attributs:
+        matrice, _ = matrice_binaire([getattr(profils[e], attribut) for e in entites])
+        matrices[attribut] = matrice
+        tailles[attribut] = np.asarray(matrice.sum(axis=1)).ravel()
+    return matrices, tailles
+
+
+# Valeurs d'un attribut selon la mesure, à partir des tailles d'intersection non nulles
+# et de celles des deux ensembles comparés
+def _valeurs_mesure(inter, taille1, taille2, mesure):
+    if mesure == 'jaccard':
+        return inter / (taille1 + taille2 - inter)
+    if mesure == 'presence':
+        return np.ones(len(inter))
+    return inter.astype(np.float64)
+
+
+# Score d'un seul attribut (Jaccard, nombre d'éléments communs ou présence) des lignes
+# [debut, fin) contre les colonnes [debut, n) (matrice creuse, colonnes décalées de `debut`)
+def composante_bloc(matrice, taille, debut, fin, mesure='jaccard'):
+    inter = (matrice[debut:fin] @ matrice[debut:].T).tocoo()
+    valeurs = _valeurs_mesure(inter.data, taille[debut + inter.row], taille[debut + inter.col], mesure)
+    return sp.csr_matrix((valeurs, (inter.row, inter.col)), shape=inter.shape)
+
+
+# Scores pondérés des lignes [debut, fin) contre les colonnes [debut, n)
+# (matrice creuse, colonnes décalées de `debut`)
+def scores_bloc(matrices, tailles, poids, debut, fin, mesure='jaccard'):
+    total = None
+    for attribut, w in poids.items():
+        composante = w * composante_bloc(matrices[attribut], tailles[attribut], debut, fin, mesure)
+        total = composante if total is None else total + composante
+    return total
+
+
+# Scores pondérés de quelques lignes (indices) contre toutes les entités
+def scores_lignes(matrices, tailles, poids, lignes, mesure='jaccard'):
+    lignes = np.asarray(lignes, dtype=np.int64)
+    total = None
+    for attribut, w in poids.items():
+        matrice = matrices[attribut]
+        inter = (matrice[lignes] @ matrice.T).tocoo()
+        valeurs = _valeurs_mesure(inter.data, tailles[attribut][lignes[inter.row]], tailles[attribut][inter.col],
+                                  mesure)
+        composante = sp.csr_matrix((w * valeurs, (inter.row, inter.col)), shape=inter.shape)
+        total = composante if total is None else total + composante
+    return total
+
+
+# Scores pondérés d'une liste de paires (sources[k], cibles[k]), par paquets de paires
+# (même calcul que scores_bloc, donc mêmes valeurs). Les attributs à petit vocabulaire
+# (années, langues, pays...) sont encodés en bitsets uint64 : intersection et union par
+# ET / OU et comptage de bits ; les autres passent par les lignes des matrices creuses.
+def scores_paires(matrices, tailles, poids, sources, cibles, mesure='jaccard', taille_paquet=200000):
+    masques = {a: masques_csr(matrices[a]) for a in poids if petit_vocabulaire(matrices[a])}
+    scores = np.zeros(len(sources))
+    for debut in range(0, len(sources), taille_paquet):
+        s = sources[debut:debut + taille_paquet]
+        c = cibles[debut:debut + taille_paquet]
+        total = np.zeros(len(s))
+        for attribut, w in poids.items():
+            if attribut in masques:
+                inter, union = intersections_unions(masques[attribut], s, c)
+            else:
+                matrice = matrices[attribut]
+                inter = np.asarray(matrice[s].multiply(matrice[c]).sum(axis=1)).ravel()
+                union = tailles[attribut][s] + tailles[attribut][c] - inter
+            valeurs = inter.astype(np.float64)
+            if mesure == 'jaccard':
+                valeurs = np.divide(valeurs, union, out=np.zeros(len(s)), where=inter > 0)
+            elif mesure == 'presence':
+                valeurs = np.ones(len(s))
+            total = total + np.where(inter > 0, w * valeurs, 0.0)
+        scores[debut:debut + taille_paquet] = total
+    return scores
+
+
+# Liste d'arêtes (i < j, score >= seuil) entre les entités, calculée par blocs de lignes
+# Avec seuil=0, on garde toutes les paires de score non nul.
+def aretes_similarite(profils, entites, poids, seuil, mesure='jaccard', taille_bloc=2000, progression=False):
+    matrices, tailles = encoder_profils(profils, entites, poids)
+    n = len(entites)
+
+    sources, cibles, scores = [], [], []
+    for debut in tqdm(range(0, n, taille_bloc), disable=not progression):
+        fin = min(debut + taille_bloc, n)
+        bloc = sp.triu(scores_bloc(matrices, tailles, poids, debut, fin, mesure), k=1).tocoo()
+        garder = bloc.data >= seuil
+        compter('paires_evaluees', bloc.nnz)
+        compter('paires_elaguees', bloc.nnz - garder.sum())
+        sources.append(debut + bloc.row[garder])
+        cibles.append(debut + bloc.col[garder])
+        scores.append(bloc.data[garder])
+
+    sources = np.concatenate(sources) if sources else np.empty(0, dtype=np.int64)
+    cibles = np.concatenate(cibles) if cibles else np.empty(0, dtype=np.int64)
+    scores = np.concatenate(scores) if scores else np.empty(0)
+
+    compter('paires_possibles', n * (n - 1) // 2)
+    compter('aretes', len(sources))
+
+    # Même ordre que la double boucle (i puis j croissants)
+    ordre = np.lexsort((cibles, sources))
+    return sources[ordre], cibles[ordre], scores[ordre]
+
+
+# Les k meilleurs voisins d'une ligne (scores non nuls, sans la ligne elle-même) ;
+# à score égal, le voisin de plus petit indice passe en premier
+def _k_meilleurs(colonnes, valeurs, k):
+    if len(valeurs) > k:
+        kieme = -np.partition(-valeurs, k - 1)[k - 1]
+        candidats = valeurs >= kieme
+        colonnes, valeurs = colonnes[candidats], valeurs[candidats]
+    ordre = np.lexsort((colonnes, -valeurs))[:k]
+    return colonnes[ordre], valeurs[ordre]
+
+
+# Graphe des k plus proches voisins : chaque entité ne garde que ses k voisins les plus
+# similaires (score >= seuil). Les lignes sont scorées par blocs contre toutes les entités
+# et réduites aussitôt à k voisins : la mémoire reste en O(n·k) hors bloc courant.
+# mutuel=False : arête si l'un des deux est parmi les k voisins de l'autre ;
+# mutuel=True : seulement si chacun est parmi les k voisins de l'autre.
+def aretes_knn(profils, entites, poids, k, mutuel=False, seuil=0, mesure='jaccard', taille_bloc=2000,
+               progression=False):
+    matrices, tailles = encoder_profils(profils, entites, poids)
+    n = len(entites)
+
+    sources, cibles, scores = [], [], []
+    for debut in tqdm(range(0, n, taille_bloc), disable=not progression):
+        fin = min(debut + taille_bloc, n)
+        bloc = scores_lignes(matrices, tailles, poids, np.arange(debut, fin), mesure).tocsr()
+        compter('paires_evaluees', bloc.nnz)
+        for ligne in range(fin - debut):
+            colonnes = bloc.indices[bloc.indptr[ligne]:bloc.indptr[ligne + 1]]
+            valeurs = bloc.data[bloc.indptr[ligne]:bloc.indptr[ligne + 1]]
+            garder = (colonnes != debut + ligne) & (valeurs >= seuil) & (valeurs > 0)
+            colonnes, valeurs = _k_meilleurs(colonnes[garder], valeurs[garder], k)
+            sources.append(np.full(len(colonnes), debut + ligne))
+            cibles.append(colonnes)
+            scores.append(valeurs)
+
+    vide = np.empty(0, dtype=np.int64)
+    sources = np.concatenate(sources).astype(np.int64) if sources else vide
+    cibles = np.concatenate(cibles).astype(np.int64) if cibles else vide
+    scores = np.concatenate(scores) if scores else np.empty(0)
+
+    # Symétrisation : chaque voisinage orienté (i -> j) devient la paire (min, max),
+    # comptée une fois (union) ou exigée dans les deux sens (mutuel)
+    bas, haut = np.minimum(sources, cibles), np.maximum(sources, cibles)
+    paires, premiers, nombres = np.unique(bas * n + haut, return_index=True, return_counts=True)
+    if mutuel:
+        premiers = premiers[nombres == 2]
+    sources, cibles, scores = bas[premiers], haut[premiers], scores[premiers]
+    compter('aretes', len(sources))
+
+    ordre = np.lexsort((cibles, sources))
+    return sources[ordre], cibles[ordre], scores[ordre]
+
+
+# Ajouter au graphe les arêtes calculées (indices -> noms des entités)
+def ajouter_aretes(G, entites, aretes):
+    sources, cibles, scores = aretes
+    G.add_weighted_edges_from(
+        (entites[i], entites[j], w) for i, j, w in zip(sources.tolist(), cibles.tolist(), scores.tolist())
+    )